@@ -2,69 +2,537 @@
 import xml.etree.ElementTree as ET
 import os
 import re
-from openpyxl import load_workbook
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Border, Side, Font, PatternFill
 from datetime import datetime
-from openpyxl.worksheet.pagebreak import Break # Import necessário para quebras de página
+# openpyxl é importado dentro das funções que geram/leem planilhas: assim o
+# executável abre rápido e falha rápido quando não há unitpro.xef
+from copy import copy
+from bisect import bisect_left
 from typing import Dict, Any, List
 import sys
+import time
+import glob
+import fnmatch
+import argparse
+import hashlib
+import pickle
+import csv
+import logging
+import tracemalloc
+import threading
+import cProfile
+import json
+from contextlib import contextmanager, nullcontext
 
 #definições ------------------------------------------
+VERSAO_FERRAMENTA = '1.7'  # Faz parte da chave do cache: alterar ao mudar a lógica de leitura
 ARQUIVO_UNITPRO = 'unitpro.xef'
-TIPOS_PERMITIDOS = ['WORD', 'BOOL', 'EBOOL', 'INT','UINT']
-
-
-# Mapeamento completo dos cartões
-MODELOS_INFO = {
-    "140ACI03000": {"canais": 8,  "prefixo": "%IW"},
-    "140ACO02000": {"canais": 4,  "prefixo": "%MW"},
-    "140ACO13000": {"canais": 8,  "prefixo": "%MW"},
-    "140ARI03010": {"canais": 8,  "prefixo": "%IW"},
-    "140DDI84100": {"canais": 32, "prefixo": "%I"},
-    "140DAI54000": {"canais": 16, "prefixo": "%I"},
-    "140DAI55300": {"canais": 32, "prefixo": "%I"},
-    "140DAO84210": {"canais": 16, "prefixo": "%M"},
-    "140DAI74000": {"canais": 16, "prefixo": "%M"},
-    "140DDI35300": {"canais": 32, "prefixo": "%I"},
-    "140DDO35300": {"canais": 32, "prefixo": "%M"},
-    "BMXDDI3202K": {"canais": 32, "prefixo": "%I"},
-    "BMXDDO3202K": {"canais": 32, "prefixo": "%M"}
-}
-MODELOS_EXCECAO = ["140CPS", "140CRA", "140NRP"]
+ARQUIVO_CATALOGO = 'catalogo_cartoes.json'  # Cartões conhecidos: empacotado com o programa; uma cópia ao lado dele tem prioridade
+CACHE_TAMANHO_MAX = 200 * 1024 * 1024  # bytes
+
+log = logging.getLogger("remote_io")
+TIPOS_PERMITIDOS = ['WORD', 'BOOL', 'EBOOL', 'INT','UINT']  # tipos que ocupam um borne State RAM
+
+
+PLACEHOLDER = "-"  # Valor de canal sem tag/comentário
+CANAIS_POR_BLOCO = 32  # Bornes impressos por slot na planilha
+LINHAS_POR_SLOT = 3 + CANAIS_POR_BLOCO  # cabeçalho (3) + bornes
+
+#----------------------CATÁLOGO DE CARTÕES----------------------------
+
+class InfoCartao:
+    __slots__ = ('canais', 'prefixo', 'largura', 'tipo')
+
+    def __init__(self, canais, prefixo, largura=None, tipo=None):
+        self.canais = canais
+        self.prefixo = prefixo
+        # Sem informação explícita: %IW/%MW são palavras analógicas, o resto bits digitais
+        analogico = prefixo.upper().endswith("W")
+        self.largura = largura or (16 if analogico else 1)
+        self.tipo = tipo or ("analogico" if analogico else "digital")
+
+class CatalogoCartoes:
+    """
+    Cartões conhecidos (part number -> InfoCartao) e famílias sem canais
+    (CPS, CRA, NOE...). As famílias ficam em uma trie de prefixos e cada part
+    number consultado é memorizado, então um rack grande custa uma consulta
+    de dicionário por módulo.
+    """
+    def __init__(self, cartoes, excecoes, origem):
+        self.cartoes = cartoes
+        self.origem = origem
+        self._trie = {}
+        for prefixo in excecoes:
+            no = self._trie
+            for letra in prefixo:
+                no = no.setdefault(letra, {})
+            no[""] = True  # fim de um prefixo
+        self._consultas = {}
+        self._avisados = set()
+        conteudo = json.dumps([sorted((k, v.canais, v.prefixo, v.largura, v.tipo) for k, v in cartoes.items()),
+                               sorted(excecoes)])
+        self.impressao = hashlib.sha256(conteudo.encode()).hexdigest()[:16]  # entra na chave do cache
+
+    @classmethod
+    def embutido(cls):
+        """
+        O catalogo_cartoes.json empacotado com o programa: é a única fonte dos
+        cartões, no .py e no executável. Sem ele o catálogo fica vazio e cada
+        cartão é avisado como desconhecido.
+        """
+        caminho = _catalogo_empacotado()
+        if os.path.isfile(caminho):
+            return cls.do_arquivo(caminho)
+        return cls({}, [], origem=f"{ARQUIVO_CATALOGO} não encontrado em {os.path.dirname(caminho)}")
+
+    @classmethod
+    def do_arquivo(cls, caminho):
+        """Lê um catalogo_cartoes.json ({"excecoes": [...], "cartoes": {part number: {...}}})."""
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+        cartoes = {}
+        for modelo, info in dados.get("cartoes", {}).items():
+            try:
+                canais = int(info["canais"])
+                prefixo = info["prefixo"]
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"{caminho}: cartão {modelo} precisa de 'canais' e 'prefixo'")
+            if not 0 <= canais <= CANAIS_POR_BLOCO:
+                raise ValueError(f"{caminho}: cartão {modelo} com {canais} canais "
+                                 f"(a planilha imprime no máximo {CANAIS_POR_BLOCO} por slot)")
+            cartoes[modelo] = InfoCartao(canais, prefixo, info.get("largura"), info.get("tipo"))
+        return cls(cartoes, dados.get("excecoes", []), origem=os.path.abspath(caminho))
+
+    def eh_excecao(self, modelo):
+        no = self._trie
+        for letra in modelo:
+            if "" in no:
+                return True
+            no = no.get(letra)
+            if no is None:
+                return False
+        return "" in no
+
+    def consultar(self, modelo):
+        """InfoCartao do part number, ou None para exceções e cartões desconhecidos."""
+        try:
+            return self._consultas[modelo]
+        except KeyError:
+            pass
+        info = None
+        if modelo and not self.eh_excecao(modelo):
+            info = self.cartoes.get(modelo)
+            if info is None and modelo not in self._avisados:
+                self._avisados.add(modelo)
+                log.warning("Aviso: cartão %s não está no catálogo (%s); o slot sai sem canais.", modelo, self.origem)
+        self._consultas[modelo] = info
+        return info
+
+def _catalogo_empacotado():
+    """Caminho do catálogo que acompanha o programa (no executável do PyInstaller, dentro de sys._MEIPASS)."""
+    base = getattr(sys, '_MEIPASS', None) or os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base, ARQUIVO_CATALOGO)
+
+CATALOGO = CatalogoCartoes.embutido()
+_catalogo_carregado = None  # (caminho, mtime_ns) do arquivo em uso
+
+def usar_catalogo(caminho):
+    """Troca o catálogo global pelo do arquivo; só relê se o arquivo mudou."""
+    global CATALOGO, _catalogo_carregado
+    chave = (os.path.abspath(caminho), os.stat(caminho).st_mtime_ns)
+    if chave != _catalogo_carregado:
+        CATALOGO = CatalogoCartoes.do_arquivo(caminho)
+        _catalogo_carregado = chave
+        log.debug("Catálogo de cartões: %s (%s modelos)", caminho, len(CATALOGO.cartoes))
+    return CATALOGO
 
 class Canal:
-    def __init__(self, numero):
-        self.numero = numero
-        self.nome = "-"
-        self.comentario = "-"
-        self.endereco = ""  
+    """
+    Visão de um canal dentro do Slot. Os dados ficam em listas do próprio Slot
+    (uma por coluna), então não existe um objeto com __dict__ por canal: esta
+    visão é criada só quando alguém acessa slot.canais[i].
+    """
+    __slots__ = ('_slot', '_indice')
+
+    def __init__(self, slot, indice):
+        self._slot = slot
+        self._indice = indice
+
+    @property
+    def numero(self):
+        return self._indice + 1
+
+    @property
+    def nome(self):
+        return self._slot._nomes[self._indice]
+
+    @nome.setter
+    def nome(self, valor):
+        self._slot._nomes[self._indice] = valor
+
+    @property
+    def comentario(self):
+        return self._slot._comentarios[self._indice]
+
+    @comentario.setter
+    def comentario(self, valor):
+        self._slot._comentarios[self._indice] = valor
+
+    @property
+    def endereco(self):
+        # Calculado a partir do endereço base do slot: só existe para State RAM
+        return self._slot.endereco_canal(self._indice)
+
+class _CanaisSlot:
+    """Sequência (len, índice, iteração) de Canal sobre as colunas do Slot."""
+    __slots__ = ('_slot',)
+
+    def __init__(self, slot):
+        self._slot = slot
+
+    def __len__(self):
+        return self._slot.qtd_canais
+
+    def __bool__(self):
+        return self._slot.qtd_canais > 0
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [Canal(self._slot, i) for i in range(self._slot.qtd_canais)[indice]]
+        if indice < 0:
+            indice += self._slot.qtd_canais
+        if not 0 <= indice < self._slot.qtd_canais:
+            raise IndexError("canal fora do slot")
+        return Canal(self._slot, indice)
+
+    def __iter__(self):
+        slot = self._slot
+        return (Canal(slot, i) for i in range(slot.qtd_canais))
+
 class Slot:
+    __slots__ = ('numero', 'modelo', 'endereco_base', 'qtd_canais', 'prefixo', '_base_numerica',
+                 '_nomes', '_comentarios')
+
     def __init__(self, numero, modelo, endereco_base):
         self.numero = numero
         self.modelo = modelo
         self.endereco_base = endereco_base  # Ex: "33" ou "ED_DROP..."
         self.qtd_canais = 0
-        self.canais = []
+        self.prefixo = ""
+        self._base_numerica = None
+
+        info = CATALOGO.consultar(modelo)
+        if info:
+            self.qtd_canais = info.canais
+            self.prefixo = info.prefixo
+            # Se for numérico, os endereços são sequenciais a partir da base
+            if str(self.endereco_base).isdigit():
+                self._base_numerica = int(self.endereco_base)
+
+        # Colunas dos canais; "-" é um único objeto compartilhado
+        self._nomes = [PLACEHOLDER] * self.qtd_canais
+        self._comentarios = [PLACEHOLDER] * self.qtd_canais
+
+    @property
+    def canais(self):
+        return _CanaisSlot(self)
+
+    def endereco_canal(self, indice):
+        """Endereço State RAM do canal (ex.: '%I33'), ou '' para cartões DDT."""
+        if self._base_numerica is None:
+            return ""
+        return f"{self.prefixo}{self._base_numerica + indice}"
 
-        if not any(self.modelo.startswith(p) for p in MODELOS_EXCECAO):
-            info = MODELOS_INFO.get(modelo)
-            if info:
-                self.qtd_canais = info['canais']
-                prefixo = info['prefixo']
-                
-                for i in range(self.qtd_canais):
-                    novo_canal = Canal(i + 1)
-                    # Se for numérico, gera o endereço sequencial
-                    if str(self.endereco_base).isdigit():
-                        num_final = int(self.endereco_base) + i
-                        novo_canal.endereco = f"{prefixo}{num_final}"
-                    self.canais.append(novo_canal)
-            
 class Drop:
     def __init__(self, numero):
         self.numero = numero
         self.slots = {} # Dicionário {numero_slot: Objeto Slot}
+
+#----------------------INSTRUMENTAÇÃO----------------------------
+
+class _EtapaAberta:
+    __slots__ = ('nome', 'pico', 'internas')
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.pico = 0         # bytes, máximo da janela da etapa
+        self.internas = 0.0   # segundos das etapas aninhadas (mesma thread)
+
+class Perfil:
+    """
+    Tempos por etapa, contadores e (quando ativo) pico de memória do tracemalloc por
+    etapa. Desativado, só mede o tempo das etapas, o que custa praticamente nada.
+    O pico do tracemalloc é um só para o processo: cada etapa guarda o máximo das
+    janelas em que esteve aberta, então etapas aninhadas (ex.: gerar_matriz_plc
+    dentro de extrair_xef no --pipeline) ou em threads (vários --format) não
+    apagam o pico umas das outras. Uma etapa aninhada leva 'dentro_de' e o tempo
+    dela sai da etapa externa: a soma dos 'segundos' não conta nada duas vezes.
+    """
+    def __init__(self):
+        self.ativo = False
+        self._trava = threading.Lock()
+        self._local = threading.local()  # pilha das etapas abertas em cada thread
+        self._abertas = []               # etapas abertas em todas as threads
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.etapas = {}      # nome -> {'segundos': float, 'memoria_pico_kb': int | None[, 'dentro_de': str]}
+        self.contadores = {}  # nome -> int
+
+    def ativar(self):
+        self.ativo = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def contar(self, nome, quantidade=1):
+        self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def _acumular_pico(self):
+        """Leva o pico da janela atual do tracemalloc a todas as etapas abertas (com a trava)."""
+        pico = tracemalloc.get_traced_memory()[1]
+        for aberta in self._abertas:
+            aberta.pico = max(aberta.pico, pico)
+
+    @contextmanager
+    def etapa(self, nome):
+        pilha = self._local.__dict__.setdefault('pilha', [])
+        externa = pilha[-1] if pilha else None
+        atual = _EtapaAberta(nome)
+        medir_memoria = self.ativo
+        if medir_memoria:
+            with self._trava:
+                self._acumular_pico()
+                tracemalloc.reset_peak()  # a janela nova começa na memória atual
+                self._abertas.append(atual)
+        pilha.append(atual)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - inicio
+            pilha.pop()
+            pico = None
+            if medir_memoria:
+                with self._trava:
+                    self._acumular_pico()
+                    self._abertas = [a for a in self._abertas if a is not atual]
+                pico = atual.pico // 1024
+            if externa is not None:
+                externa.internas += total
+            duracao = total - atual.internas
+            anterior = self.etapas.get(nome)
+            if anterior:
+                # Etapa repetida (ex.: vários arquivos no mesmo processo): acumula
+                duracao += anterior['segundos']
+                if pico is not None and anterior['memoria_pico_kb'] is not None:
+                    pico = max(pico, anterior['memoria_pico_kb'])
+            self.etapas[nome] = {'segundos': round(duracao, 6), 'memoria_pico_kb': pico}
+            if externa is not None:
+                self.etapas[nome]['dentro_de'] = externa.nome
+            log.debug("Etapa %s: %.3f s", nome, total)
+
+    def relatorio(self):
+        return {'etapas': dict(self.etapas), 'contadores': dict(self.contadores)}
+
+PERFIL = Perfil()
+
+#----------------------LEITURA DO ARQUIVO XEF (PASSADA ÚNICA)----------------------------
+
+class DadosXEF:
+    """Tudo o que o programa usa do .xef, extraído em uma única leitura do arquivo."""
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.titulo = None        # atributo 'name' do contentHeader (None = sem header)
+        self.familia_plc = None   # atributo 'family' do PLC/partItem
+        self.modulos = []         # elementos de módulo (<moduleQuantum>, ... ver EXTRATORES_MODULO)
+        self.variaveis = []       # elementos <variables> (com os instanceElementDesc)
+        self.aliases_ddt = {}     # nome da variável -> {indice do canal: Alias}
+        self.comentarios_ddt = {} # nome da variável -> {indice do canal: comentário do elemento [n]}
+        self.ddt_desejados = None # nomes de DDT cujos Alias interessam (None = todos; ver FiltroHardware)
+
+    def guardar(self, elem):
+        """Guarda um subtree completo (módulo ou <variables>), igual nos dois leitores."""
+        if elem.tag != "variables":
+            self.modulos.append(elem)
+            return
+        self.variaveis.append(elem)
+        nome = elem.get("name")
+        if nome and nome not in self.aliases_ddt and (self.ddt_desejados is None or nome in self.ddt_desejados):
+            aliases, comentarios = _canais_ddt(elem)
+            if aliases:
+                self.aliases_ddt[nome] = aliases
+            if comentarios:
+                self.comentarios_ddt[nome] = comentarios
+
+def _canais_ddt(var_elem):
+    """
+    ({indice: Alias}, {indice: comentário}) de uma variável DDT, de [n] -> VALUE
+    (em qualquer nível, ex.: DIS_CH_IN -> [n] -> VALUE). O comentário é o do
+    VALUE ou, sem ele, o do próprio [n]: vale para o canal cujo Alias não tem comentário.
+    """
+    aliases = {}
+    comentarios = {}
+    for ch_desc in var_elem.iter("instanceElementDesc"):
+        ch_name = ch_desc.get("name", "")
+        if not (ch_name.startswith("[") and ch_name.endswith("]")):
+            continue
+        try:
+            idx = int(ch_name.strip("[]"))
+        except ValueError:
+            continue
+        val_node = ch_desc.find(".//instanceElementDesc[@name='VALUE']")
+        if val_node is not None:
+            alias = val_node.find("attribute[@name='Alias']")
+            if alias is not None:
+                valor = alias.get("value")
+                aliases[idx] = sys.intern(valor) if valor else valor
+        comentario = (_texto_do_comentario(val_node) if val_node is not None else "") or _texto_do_comentario(ch_desc)
+        if comentario:
+            comentarios[idx] = comentario
+    return aliases, comentarios
+
+def extrair_xef(caminho, ao_ler_hardware=None):
+    """
+    Percorre o .xef uma única vez com iterparse e guarda somente contentHeader,
+    PLC/partItem, módulos (ver _extrator_do_elemento) e variables. Os demais subtrees (FFBBlock,
+    objPosition, inputVariable...) são descartados assim que terminam, então a
+    memória cresce com o que é mantido e não com o tamanho do arquivo.
+    ao_ler_hardware(dados) é chamado no fim do IOConf, com os módulos completos e
+    a leitura das variáveis ainda pela frente (usado pelo modo --pipeline).
+    """
+    dados = DadosXEF(caminho)
+    pilha = []      # elementos abertos, do root até o atual
+    mantido = None  # raiz do subtree que está sendo guardado
+
+    for evento, elem in ET.iterparse(caminho, events=("start", "end")):
+        if evento == "start":
+            pilha.append(elem)
+            if mantido is None and (elem.tag == "variables" or _extrator_do_elemento(elem.tag)):
+                mantido = elem
+            continue
+
+        pilha.pop()
+        if mantido is not None and elem is not mantido:
+            continue  # filho de um subtree guardado: fica intacto
+
+        pai = pilha[-1] if pilha else None
+        if elem is mantido:
+            dados.guardar(elem)
+            mantido = None
+        elif elem.tag == "contentHeader" and len(pilha) == 1 and dados.titulo is None:
+            dados.titulo = elem.get("name", "Projeto_Sem_Nome")
+        elif elem.tag == "partItem" and pai is not None and pai.tag == "PLC" and dados.familia_plc is None:
+            dados.familia_plc = elem.get("family", "Modelo Desconhecido")
+        else:
+            if ao_ler_hardware is not None and elem.tag == "IOConf" and len(pilha) == 1:
+                ao_ler_hardware(dados)
+            elem.clear()
+
+        # Desanexa o elemento já processado para o root não acumular filhos
+        if pai is not None and len(pai) and pai[-1] is elem:
+            del pai[-1]
+
+    return dados
+
+# Modo de memória limitada: só estes filhos do root são percorridos; o resto
+# (program, FBSource, DDTSource, Documentation...) é pulado ainda no tokenizador
+SECOES_MANTIDAS = ("contentHeader", "IOConf", "dataBlock")
+BLOCO_LEITURA = 1024 * 1024  # bytes entregues ao expat por vez
+
+def extrair_xef_limitado(caminho, ao_ler_hardware=None):
+    """
+    Mesmo resultado de extrair_xef, mas com memória limitada independente do
+    tamanho do .xef. O arquivo é entregue ao expat em blocos de BLOCO_LEITURA e
+    só viram Element os subtrees de hardware (módulos, com equipInfo,
+    moduleInfo e deviceDDT) e as variáveis do dataBlock. Dentro das seções
+    puladas nenhum Element, atributo ou texto é guardado: o handler só conta a
+    profundidade até o fim da seção. Com isso o pico é ~ o modelo mantido
+    (hardware + declarações de variáveis) + um bloco de leitura.
+    Diferença para extrair_xef: as declarações de parâmetros de DFB/EF
+    (FBSource, EFSource...) não entram em dados.variaveis.
+    ao_ler_hardware: o mesmo gancho de extrair_xef.
+    """
+    from xml.parsers import expat
+
+    dados = DadosXEF(caminho)
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    caminho_aberto = []  # tags abertas fora de subtrees mantidos/pulados
+    estado = {'pulando': 0, 'construtor': None, 'profundidade': 0}
+
+    def inicio_pulando(tag, atributos):
+        estado['pulando'] += 1
+
+    def fim_pulando(tag):
+        estado['pulando'] -= 1
+        if estado['pulando'] == 0:
+            parser.StartElementHandler = inicio
+            parser.EndElementHandler = fim
+            parser.CharacterDataHandler = texto
+
+    def texto(conteudo):
+        if estado['construtor'] is not None:
+            estado['construtor'].data(conteudo)
+
+    def inicio(tag, atributos):
+        construtor = estado['construtor']
+        if construtor is not None:
+            construtor.start(tag, atributos)
+            estado['profundidade'] += 1
+            return
+
+        profundidade = len(caminho_aberto)
+        if profundidade == 1 and tag not in SECOES_MANTIDAS:
+            estado['pulando'] = 1
+            parser.StartElementHandler = inicio_pulando
+            parser.EndElementHandler = fim_pulando
+            parser.CharacterDataHandler = None
+            return
+
+        if _extrator_do_elemento(tag) or (tag == "variables" and caminho_aberto[-1:] == ["dataBlock"]):
+            construtor = estado['construtor'] = ET.TreeBuilder()
+            construtor.start(tag, atributos)
+            estado['profundidade'] = 1
+            return
+
+        if tag == "contentHeader" and profundidade == 1 and dados.titulo is None:
+            dados.titulo = atributos.get("name", "Projeto_Sem_Nome")
+        elif tag == "partItem" and caminho_aberto[-1:] == ["PLC"] and dados.familia_plc is None:
+            dados.familia_plc = atributos.get("family", "Modelo Desconhecido")
+        caminho_aberto.append(tag)
+
+    def fim(tag):
+        construtor = estado['construtor']
+        if construtor is None:
+            caminho_aberto.pop()
+            if ao_ler_hardware is not None and tag == "IOConf" and len(caminho_aberto) == 1:
+                ao_ler_hardware(dados)
+            return
+
+        construtor.end(tag)
+        estado['profundidade'] -= 1
+        if estado['profundidade']:
+            return
+
+        estado['construtor'] = None
+        dados.guardar(construtor.close())
+
+    parser.StartElementHandler = inicio
+    parser.EndElementHandler = fim
+    parser.CharacterDataHandler = texto
+
+    with (open(caminho, "rb") if isinstance(caminho, (str, os.PathLike)) else nullcontext(caminho)) as f:
+        while True:
+            bloco = f.read(BLOCO_LEITURA)
+            parser.Parse(bloco, not bloco)
+            if not bloco:
+                break
+    return dados
+
+def _obter_dados(fonte):
+    """Aceita o caminho do .xef ou um DadosXEF já extraído."""
+    if isinstance(fonte, DadosXEF):
+        return fonte
+    return extrair_xef(fonte)
 '''
 def gerar_matriz_plc(caminho):
     tree = ET.parse(caminho)
@@ -105,57 +573,186 @@ def gerar_matriz_plc(caminho):
     return drops
 '''
 
-def gerar_matriz_plc(caminho):
-    tree = ET.parse(caminho)
-    root = tree.getroot()
-    
-    drops = {} # Dicionário {numero_drop: Objeto Drop}
+#----------------------MÓDULOS E ENDEREÇAMENTO TOPOLÓGICO----------------------------
+# Extratores: tag do elemento -> função(elem) que devolve (part number, topoAddress,
+# endereço) ou None. Tags "module*" sem extrator próprio (módulos X80/BMX de M340/M580)
+# usam o extrator padrão, que só depende de partItem/equipInfo/moduleInfo/deviceDDT.
+
+def _endereco_do_modulo(module):
+    """Nome do device DDT, base State RAM (maior offset de entrada/saída) ou 'Desconhecido'."""
+    vision_type = module.get("IOVision")
+    device_ddt = module.find("deviceDDT")
+    if vision_type == "device DDT" or (vision_type is None and device_ddt is not None):
+        # Busca o atributo implInstName dentro da tag deviceDDT
+        if device_ddt is not None:
+            return device_ddt.get("implInstName")
+        return "Desconhecido"
+
+    # "state ram full" ou módulo sem IOVision (rack local do Quantum): offsets do moduleInfo
+    module_info = module.find("moduleInfo")
+    if module_info is not None:
+        offsets = [module_info.get("inputRefOffset"), module_info.get("outputRefOffset")]
+        offsets = [int(o) for o in offsets if o and o.isdigit()]
+        if offsets and (vision_type == "state ram full" or max(offsets) > 0):
+            return str(max(offsets))
+    return "Desconhecido"
+
+def _extrair_modulo_padrao(module):
+    part_item = module.find("partItem")
+    equip_info = module.find("equipInfo")
+    if part_item is None or equip_info is None:
+        return None
+    return part_item.get("partNumber"), equip_info.get("topoAddress"), _endereco_do_modulo(module)
 
-    for module in root.findall(".//moduleQuantum"):
+EXTRATORES_MODULO = {
+    "moduleQuantum": _extrair_modulo_padrao,
+}
+
+def _extrator_do_elemento(tag):
+    """Extrator registrado para a tag; 'module*' (exceto moduleInfo) cai no extrator padrão."""
+    extrator = EXTRATORES_MODULO.get(tag)
+    if extrator is None and tag.startswith("module") and tag != "moduleInfo":
+        extrator = _extrair_modulo_padrao
+    return extrator
+
+# Esquemas de topoAddress (\barramento.drop\rack.slot), testados em ordem.
+# Cada um devolve (drop, slot). O rack local (CPU) tem chave própria: o drop 1
+# da RIO (\2.1\1.S) existe na prática e não pode receber os módulos da CPU.
+DROP_RACK_LOCAL = 0
+ESQUEMAS_TOPOLOGIA = [
+    ("rio_quantum", re.compile(r'\\2\.(\d+)\\1\.(\d+)'), lambda m: (int(m.group(1)), int(m.group(2)))),
+    ("rack_local",  re.compile(r'^\\[01]\.[01]\\[01]\.(\d+)$'), lambda m: (DROP_RACK_LOCAL, int(m.group(1)))),
+    ("rio_ethernet", re.compile(r'^\\(\d+)\.(\d+)\\0\.(\d+)$'), lambda m: (int(m.group(2)), int(m.group(3)))),
+]
+
+def _rotulo_drop(num_drop):
+    """Texto da coluna 'Drop' no cabeçalho do bloco: 'Drop 02' ou, para DROP_RACK_LOCAL, 'Rack Local' (em duas linhas)."""
+    return "Rack\nLocal" if num_drop == DROP_RACK_LOCAL else f"Drop\n{num_drop:02d}"
+
+def _drop_do_rotulo(texto):
+    """Inverso de _rotulo_drop; None se o texto não é um rótulo de drop."""
+    if texto == "Rack\nLocal":
+        return DROP_RACK_LOCAL
+    if texto.startswith("Drop\n"):
         try:
-            # 1. Pegar o Part Number (Modelo)
-            part_item = module.find("partItem")
-            modelo = part_item.get("partNumber")
+            return int(texto.split("\n", 1)[1])
+        except ValueError:
+            return None
+    return None
 
-            # 2. Lógica para capturar o ENDEREÇO baseado no IOVision
-            vision_type = module.get("IOVision")
-            endereco = "Desconhecido"
+def localizar_modulo(topo_address):
+    """(esquema, drop, slot) do topoAddress, ou None se nenhum esquema reconhece o endereço."""
+    for nome, regex, converter in ESQUEMAS_TOPOLOGIA:
+        match = regex.search(topo_address)
+        if match:
+            return (nome,) + converter(match)
+    return None
 
-            if vision_type == "device DDT":
-                # Busca o atributo implInstName dentro da tag deviceDDT
-                device_ddt = module.find("deviceDDT")
-                if device_ddt is not None:
-                    endereco = device_ddt.get("implInstName")
-            
-            elif vision_type == "state ram full":
-                # Busca o atributo inputRefOffset dentro da tag moduleInfo
-                module_info = module.find("moduleInfo")
-                if module_info is not None:
-                    endereco_input = module_info.get("inputRefOffset")
-                    endereco_output = module_info.get("outputRefOffset")
-                    endereco = max(endereco_input, endereco_output)
-                    
-            # 3. Pegar o TopoAddress para localizar Drop/Slot
-            equip_info = module.find("equipInfo")
-            topo_address = equip_info.get("topoAddress")
+def _faixas(valores):
+    """Números e pares (início, fim) -> tupla ordenada de faixas (início, fim) sem sobreposição."""
+    faixas = []
+    for valor in sorted((v, v) if isinstance(v, int) else tuple(v) for v in valores):
+        inicio, fim = valor
+        if fim < inicio:
+            raise ValueError(f"faixa invertida: {inicio}-{fim}")
+        if faixas and inicio <= faixas[-1][1] + 1:
+            faixas[-1] = (faixas[-1][0], max(fim, faixas[-1][1]))
+        else:
+            faixas.append((inicio, fim))
+    return tuple(faixas)
 
-            # Regex para extrair DROP e SLOT do endereço \2.X\1.Y
-            match = re.search(r'\\2\.(\d+)\\1\.(\d+)', topo_address)
-            if match:
-                num_drop = int(match.group(1))
-                num_slot = int(match.group(2))
+def _nas_faixas(numero, faixas):
+    return any(inicio <= numero <= fim for inicio, fim in faixas)
+
+class FiltroHardware:
+    """
+    Seleção parcial da lista de IO (--drop 2,5 --slot 4-10 --card 140DDI*):
+    faixas de drops/slots e padrões (fnmatch, sem diferenciar maiúsculas) de
+    Part Number; None = sem restrição. drops/slots aceitam números e pares
+    (início, fim), guardados como faixas: '0-999999999' não vira um conjunto.
+    Aplicado em gerar_matriz_plc, antes de montar os slots, ou sobre um modelo
+    já montado (ex.: vindo do cache).
+    """
+    __slots__ = ('drops', 'slots', 'cartoes')
+
+    def __init__(self, drops=None, slots=None, cartoes=None):
+        self.drops = _faixas(drops) if drops is not None else None
+        self.slots = _faixas(slots) if slots is not None else None
+        self.cartoes = [c.upper() for c in cartoes] if cartoes else None
+
+    def aceita(self, num_drop, num_slot, modelo):
+        if self.drops is not None and not _nas_faixas(num_drop, self.drops):
+            return False
+        if self.slots is not None and not _nas_faixas(num_slot, self.slots):
+            return False
+        if self.cartoes is not None:
+            modelo = (modelo or "").upper()
+            return any(fnmatch.fnmatchcase(modelo, padrao) for padrao in self.cartoes)
+        return True
+
+    def filtrar_matriz(self, matriz_hardware):
+        """Nova matriz só com os slots aceitos (os Slot são os mesmos objetos); drops vazios saem."""
+        matriz = {}
+        for num_drop, obj_drop in matriz_hardware.items():
+            slots = {n: s for n, s in obj_drop.slots.items() if self.aceita(num_drop, n, s.modelo)}
+            if slots:
+                matriz[num_drop] = Drop(num_drop)
+                matriz[num_drop].slots = slots
+        return matriz
+
+    def aplicar(self, modelo):
+        return dict(modelo, matriz=self.filtrar_matriz(modelo['matriz']))
+
+def _tem_slot_impresso(matriz_hardware):
+    """Se a matriz tem algum slot que vira bloco na planilha (slot >= 3): um filtro que não deixa nenhum é erro."""
+    return any(n >= 3 for d in matriz_hardware.values() for n in d.slots)
+
+def gerar_matriz_plc(caminho, filtro=None):
+    dados = _obter_dados(caminho)
+
+    drops = {} # Dicionário {numero_drop: Objeto Drop}
+
+    for module in dados.modulos:
+        PERFIL.contar("modulos_lidos")
+        try:
+            # 1. Part Number, TopoAddress e endereço pelo extrator do tipo de elemento
+            lido = _extrator_do_elemento(module.tag)(module)
+            if lido is None:
+                continue
+            modelo, topo_address, endereco = lido
+
+            # 2. Drop/Slot pelo esquema de endereçamento (RIO \2.X\1.Y, rack local, Ethernet RIO)
+            local = localizar_modulo(topo_address or "")
+            if local and filtro is not None and not filtro.aceita(local[1], local[2], modelo):
+                PERFIL.contar("modulos_filtrados")
+            elif local:
+                esquema, num_drop, num_slot = local
 
                 # Adiciona Drop se não existir
                 if num_drop not in drops:
                     drops[num_drop] = Drop(num_drop)
-                
+
+                # Dois módulos na mesma posição: fica o primeiro, nada é sobrescrito em silêncio
+                existente = drops[num_drop].slots.get(num_slot)
+                if existente is not None:
+                    log.warning("Aviso: %s (%s) está na mesma posição que %s (%s %s slot %02d); ignorado.",
+                                modelo, topo_address, existente.modelo, esquema,
+                                _rotulo_drop(num_drop).replace("\n", " "), num_slot)
+                    PERFIL.contar("modulos_em_conflito")
+                    continue
+
                 # Adiciona Slot ao Drop com o novo parâmetro 'endereco'
                 drops[num_drop].slots[num_slot] = Slot(num_slot, modelo, endereco)
                 
-                print(f"Mapeado: Drop {num_drop}, Slot {num_slot} -> Modelo {modelo} | Endereço: {endereco}")
+                PERFIL.contar("modulos_mapeados")
+                PERFIL.contar(f"modulos_{esquema}")
+                log.debug("Mapeado (%s): Drop %s, Slot %s -> Modelo %s | Endereço: %s",
+                          esquema, num_drop, num_slot, modelo, endereco)
+            else:
+                log.debug("Módulo %s fora dos esquemas conhecidos: %s", modelo, topo_address)
 
         except Exception as e:
-            print(f"Erro ao processar módulo: {e}")
+            log.error("Erro ao processar módulo: %s", e)
 
     return drops
 
@@ -189,35 +786,152 @@ def ler_variaveis_unitpro(caminho_arquivo: str) -> List[Dict[str, str]]:
             })
     return lista_variaveis
 '''
-def ler_variaveis_unitpro(caminho_arquivo: str) -> Dict[str, Dict[str, str]]:
-    """Retorna um dicionário onde a chave é o NOME da variável."""
-    mapa_por_nome = {}
+#----------------------CATÁLOGO DE VARIÁVEIS----------------------------
+
+class Variavel:
+    """
+    Visão de uma variável do CatalogoVariaveis. Aceita v['nome'], v['comentario'],
+    v['endereco'] e v['tipo'] como o dict por variável de antes; o comentário só
+    é decodificado quando lido.
+    """
+    __slots__ = ('_catalogo', '_indice')
+    CAMPOS = ('nome', 'comentario', 'endereco', 'tipo')
+
+    def __init__(self, catalogo, indice):
+        self._catalogo = catalogo
+        self._indice = indice
+
+    @property
+    def nome(self):
+        return self._catalogo._nomes[self._indice]
+
+    @property
+    def tipo(self):
+        return self._catalogo._tipos[self._indice]
+
+    @property
+    def endereco(self):
+        return self._catalogo._enderecos[self._indice]
+
+    @property
+    def comentario(self):
+        return self._catalogo.comentario(self._indice)
+
+    def __getitem__(self, campo):
+        if campo not in self.CAMPOS:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+class CatalogoVariaveis:
+    """
+    Todas as variáveis declaradas no .xef, de qualquer tipo, em colunas: nomes e
+    tipos internados (cada tipo é um único objeto), endereços e os comentários
+    como UTF-8 em um único bytearray com offsets em array, sem um objeto str
+    por comentário até alguém ler. Comentários de elementos (instanceElementDesc)
+    entram como variáveis próprias, com o caminho do elemento ('VAR[0].VALUE') e
+    tipo None. Funciona como o antigo dict nome -> {'nome', 'comentario',
+    'endereco', 'tipo'}: catalogo[nome]['comentario'], in, get, items, len.
+    Nome repetido: vale a última declaração.
+    """
+    __slots__ = ('_posicao', '_nomes', '_tipos', '_enderecos', '_texto', '_inicios', '_fins')
+
+    def __init__(self):
+        from array import array
+        self._posicao = {}  # nome -> índice nas colunas
+        self._nomes = []
+        self._tipos = []
+        self._enderecos = []
+        self._texto = bytearray()
+        self._inicios = array('Q')
+        self._fins = array('Q')
+
+    def adicionar(self, nome, tipo, endereco, comentario):
+        nome = sys.intern(nome)  # o mesmo objeto é reaproveitado pelos canais da matriz
+        tipo = sys.intern(tipo) if tipo else None
+        inicio = len(self._texto)
+        if comentario:
+            self._texto += comentario.encode("utf-8")
+        indice = self._posicao.get(nome)
+        if indice is None:
+            self._posicao[nome] = len(self._nomes)
+            self._nomes.append(nome)
+            self._tipos.append(tipo)
+            self._enderecos.append(endereco)
+            self._inicios.append(inicio)
+            self._fins.append(len(self._texto))
+        else:
+            self._tipos[indice] = tipo
+            self._enderecos[indice] = endereco
+            self._inicios[indice] = inicio
+            self._fins[indice] = len(self._texto)
+
+    def comentario(self, indice):
+        inicio, fim = self._inicios[indice], self._fins[indice]
+        return self._texto[inicio:fim].decode("utf-8") if fim > inicio else ""
+
+    def __len__(self):
+        return len(self._nomes)
+
+    def __contains__(self, nome):
+        return nome in self._posicao
+
+    def __iter__(self):
+        return iter(self._nomes)
+
+    def __getitem__(self, nome):
+        return Variavel(self, self._posicao[nome])
+
+    def get(self, nome, padrao=None):
+        indice = self._posicao.get(nome)
+        return padrao if indice is None else Variavel(self, indice)
+
+    def items(self):
+        return ((nome, Variavel(self, i)) for i, nome in enumerate(self._nomes))
+
+    def enderecadas(self, tipos):
+        """(nome, endereço) das variáveis com endereço cujo tipo está em 'tipos', direto das colunas."""
+        for nome, tipo, endereco in zip(self._nomes, self._tipos, self._enderecos):
+            if endereco and tipo in tipos:
+                yield nome, endereco
+
+def _texto_do_comentario(elem):
+    comentario_elem = elem.find('comment')
+    return comentario_elem.text.strip() if comentario_elem is not None and comentario_elem.text else ""
+
+def _comentarios_aninhados(elem, caminho, catalogo):
+    """Cataloga os instanceElementDesc com comentário: '[i]' vira VAR[i], campos viram VAR.CAMPO."""
+    for desc in elem.findall("instanceElementDesc"):
+        nome = desc.get("name", "")
+        if not nome:
+            continue
+        caminho_desc = caminho + nome if nome.startswith("[") else f"{caminho}.{nome}"
+        comentario = _texto_do_comentario(desc)
+        if comentario:
+            catalogo.adicionar(caminho_desc, None, None, comentario)
+            PERFIL.contar("comentarios_aninhados")
+        if len(desc):
+            _comentarios_aninhados(desc, caminho_desc, catalogo)
+
+def ler_variaveis_unitpro(caminho_arquivo: str) -> CatalogoVariaveis:
+    """Retorna o catálogo de todas as variáveis, indexado pelo NOME (ver CatalogoVariaveis)."""
+    catalogo = CatalogoVariaveis()
     try:
-        tree = ET.parse(caminho_arquivo)
-        root = tree.getroot()
+        dados = _obter_dados(caminho_arquivo)
     except Exception as e:
-        print(f"ERRO: {e}")
-        return mapa_por_nome
+        log.error("ERRO: %s", e)
+        return catalogo
 
-    for var_element in root.findall('.//variables'):
+    PERFIL.contar("variaveis_lidas", len(dados.variaveis))
+    for var_element in dados.variaveis:
         nome = var_element.get('name')
         if not nome: continue
-        
-        tipo = var_element.get('typeName')
-        endereco_raw = var_element.get('topologicalAddress')
-        
-        comentario_elem = var_element.find('comment')
-        comentario = comentario_elem.text.strip() if comentario_elem is not None and comentario_elem.text else ""
-
-        if tipo in TIPOS_PERMITIDOS:
-            mapa_por_nome[nome] = {
-                'nome': nome,
-                'comentario': comentario,
-                'endereco': endereco_raw, # Mantemos o original aqui (%I00033)
-                'tipo': tipo
-            }
-    return mapa_por_nome
 
+        catalogo.adicionar(nome, var_element.get('typeName'),
+                           var_element.get('topologicalAddress'),  # Mantemos o original aqui (%I00033)
+                           _texto_do_comentario(var_element))
+        if len(var_element):
+            _comentarios_aninhados(var_element, nome, catalogo)
+    return catalogo
 
 '''
 def preencher_canais_da_matriz(caminho_arquivo, matriz_hardware):
@@ -264,62 +978,79 @@ def preencher_canais_da_matriz(caminho_arquivo, matriz_hardware):
                         except ValueError:
                             continue
 '''
+RE_ENDERECO = re.compile(r'(%[a-zA-Z]+)(\d+)')
+
 def normalizar_endereco(endereco_str):
     """Converte '%I00033' ou '%I33' em ('%I', 33) para comparação justa."""
     if not endereco_str or not endereco_str.startswith("%"):
         return None
-    match = re.match(r'(%[a-zA-Z]+)(\d+)', endereco_str)
+    match = RE_ENDERECO.match(endereco_str)
     if match:
         prefixo = match.group(1).upper()
         numero = int(match.group(2))
         return (prefixo, numero)
     return None
 
+def montar_indice_enderecos(mapa_por_nome):
+    """
+    Índice State RAM por prefixo: {'%I': ([33, 34, ...], [nome, nome, ...])}, com
+    os números ordenados. Cada endereço de variável é normalizado uma única vez;
+    em endereços repetidos vale a última variável (mesmo critério de antes).
+    Só os tipos de TIPOS_PERMITIDOS ocupam um canal (um REAL ou uma estrutura
+    em %MW não é o borne daquele endereço).
+    """
+    por_prefixo = {}
+    for nome, endereco in mapa_por_nome.enderecadas(TIPOS_PERMITIDOS):
+        norm = normalizar_endereco(endereco)
+        if norm:
+            por_prefixo.setdefault(norm[0], {})[norm[1]] = nome
+
+    indice = {}
+    for prefixo, numeros in por_prefixo.items():
+        ordenados = sorted(numeros)
+        indice[prefixo] = (ordenados, [numeros[n] for n in ordenados])
+    return indice
+
 def preencher_canais_da_matriz(caminho_arquivo, matriz_hardware, mapa_por_nome):
-    # Índice auxiliar para State RAM: (Prefixo, Numero) -> Nome
-    # Isso resolve o problema de busca rápida por endereço
-    indice_endereco = {}
-    for nome, dados in mapa_por_nome.items():
-        if dados['endereco']:
-            norm = normalizar_endereco(dados['endereco'])
-            if norm:
-                indice_endereco[norm] = nome
+    # Índice auxiliar para State RAM: prefixo -> números ordenados / nomes
+    indice_endereco = montar_indice_enderecos(mapa_por_nome)
 
-    tree = ET.parse(caminho_arquivo)
-    root = tree.getroot()
+    dados_xef = _obter_dados(caminho_arquivo)
 
     for drop in matriz_hardware.values():
         for slot in drop.slots.values():
             if not slot.canais: continue
 
             # SITUAÇÃO 1: STATE RAM (Endereço base numérico)
-            if str(slot.endereco_base).isdigit():
-                for canal in slot.canais:
-                    chave_canal = normalizar_endereco(canal.endereco)
-                    nome_encontrado = indice_endereco.get(chave_canal)
-                    
-                    if nome_encontrado:
-                        dados = mapa_por_nome[nome_encontrado]
-                        canal.nome = dados['nome']
-                        canal.comentario = dados['comentario']
-
-            # SITUAÇÃO 2: DDT (Busca o Alias no XML)
+            if slot._base_numerica is not None:
+                # O bloco base .. base+qtd_canais-1 sai de uma vez com duas buscas binárias
+                numeros, nomes = indice_endereco.get(slot.prefixo.upper(), ((), ()))
+                base = slot._base_numerica
+                inicio = bisect_left(numeros, base)
+                fim = bisect_left(numeros, base + slot.qtd_canais, inicio)
+                for k in range(inicio, fim):
+                    dados = mapa_por_nome[nomes[k]]
+                    idx = numeros[k] - base
+                    slot._nomes[idx] = dados['nome']
+                    slot._comentarios[idx] = dados['comentario']
+                PERFIL.contar("enderecos_resolvidos", fim - inicio)
+
+            # SITUAÇÃO 2: DDT (Alias vindo do índice montado na leitura do XML)
             else:
-                var_node = root.find(f".//variables[@name='{slot.endereco_base}']")
-                if var_node is not None:
-                    for ch_desc in var_node.findall(".//instanceElementDesc"):
-                        ch_name = ch_desc.get("name", "")
-                        if ch_name.startswith("[") and ch_name.endswith("]"):
-                            idx = int(ch_name.strip("[]"))
-                            if idx < len(slot.canais):
-                                val_node = ch_desc.find(".//instanceElementDesc[@name='VALUE']")
-                                if val_node is not None:
-                                    alias = val_node.find("attribute[@name='Alias']")
-                                    if alias is not None:
-                                        # Aqui está o pulo do gato: o Alias é o NOME
-                                        slot.canais[idx].nome = alias.get("value")
+                aliases = dados_xef.aliases_ddt.get(slot.endereco_base)
+                if aliases:
+                    for idx, alias in aliases.items():
+                        if idx < len(slot.canais):
+                            # Aqui está o pulo do gato: o Alias é o NOME
+                            slot.canais[idx].nome = alias
+                            PERFIL.contar("aliases_resolvidos")
+                # Comentário do elemento [n]: fica se o Alias não trouxer um (ver preencher_comentarios_na_matriz)
+                for idx, comentario in dados_xef.comentarios_ddt.get(slot.endereco_base, {}).items():
+                    if idx < len(slot.canais):
+                        slot.canais[idx].comentario = comentario
+                        PERFIL.contar("comentarios_de_elementos")
+
 
- 
 
 
 
@@ -332,9 +1063,12 @@ def preencher_comentarios_na_matriz(matriz_hardware, mapa_por_nome):
                     # Busca direta por NOME no dicionário
                     dados = mapa_por_nome.get(canal.nome.strip())
                     if dados:
-                        canal.comentario = dados['comentario']
+                        # Alias sem comentário não apaga o do elemento DDT (preencher_canais_da_matriz)
+                        if dados['comentario'] or canal.comentario == PLACEHOLDER:
+                            canal.comentario = dados['comentario']
                         contador += 1
-    print(f"Sucesso: {contador} comentários processados.")
+    PERFIL.contar("comentarios_preenchidos", contador)
+    log.info("Sucesso: %s comentários processados.", contador)
 
 
 '''
@@ -367,16 +1101,15 @@ def preencher_comentarios_na_matriz(matriz_hardware, lista_variaveis_lidas):
 def ler_titulo_modelo(caminho_arquivo_xef: str, lista_variaveis_lidas: List[Dict[str, Any]]) -> str:
  
     
+    MODELO = "PLC"
+    dados = None
     try:
-        tree = ET.parse(caminho_arquivo_xef)
-        root = tree.getroot()
-        # Busca o partItem que está dentro de PLC
-        plc_part = root.find(".//PLC/partItem")
-        if plc_part is not None:
-            MODELO = plc_part.get("family", "Modelo Desconhecido")
+        dados = _obter_dados(caminho_arquivo_xef)
+        # partItem que está dentro de PLC (capturado na extração)
+        if dados.familia_plc is not None:
+            MODELO = dados.familia_plc
     except Exception as e:
-        print(f"Erro ao extrair família do PLC: {e}")
-        MODELO = "PLC"
+        log.error("Erro ao extrair família do PLC: %s", e)
 
     """
     Lê o atributo 'name' da tag contentHeader no arquivo XEF.
@@ -387,27 +1120,16 @@ def ler_titulo_modelo(caminho_arquivo_xef: str, lista_variaveis_lidas: List[Dict
     # --- 1. Lógica Original de Leitura do Título no XML ---
     
     titulo_lido = 'Projeto_Invalido'
-    
-    try:
-        tree = ET.parse(caminho_arquivo_xef)
-        root = tree.getroot()
-        header = root.find('contentHeader')
-        
-        if header is not None:
-            # Pega o nome. Se não houver, usa 'Projeto_Sem_Nome'.
-            titulo_lido = header.get('name', 'Projeto_Sem_Nome')
-        else:
-            titulo_lido = 'Projeto_Sem_Header'
-            
-    except (FileNotFoundError, ET.ParseError):
-        # Mantém 'Projeto_Invalido'
-        pass
+
+    if dados is not None:
+        # O nome já vem como 'Projeto_Sem_Nome' quando o header não tem o atributo
+        titulo_lido = dados.titulo if dados.titulo is not None else 'Projeto_Sem_Header'
         
     # --- 2. Lógica de Verificação e Substituição para "_DCOM" e tipo "WORD" ---
     
     if titulo_lido == "Project":
         
-        print("\nAlerta: Título original encontrado é 'Project'. Buscando fallback '_DCOM' (Tipo WORD)...")
+        log.warning("Alerta: Título original encontrado é 'Project'. Buscando fallback '_DCOM' (Tipo WORD)...")
         
         # Procura a primeira variável que atenda a ambas as condições
         for variavel in lista_variaveis_lidas:
@@ -424,11 +1146,11 @@ def ler_titulo_modelo(caminho_arquivo_xef: str, lista_variaveis_lidas: List[Dict
             
             # Verifica se AMBAS as condições são atendidas
             if condicao_dcom and condicao_word:
-                print(f"Substituindo 'Project' pela tag: {nome_variavel}")
+                log.info("Substituindo 'Project' pela tag: %s", nome_variavel)
                 return nome_variavel.removesuffix('_DCOM'), MODELO # Retorna imediatamente o novo título
                 
         # 3. Se o loop terminar sem encontrar a tag "_DCOM" tipo "WORD"
-        print("Aviso: Nenhuma tag '_DCOM' do tipo 'WORD' foi localizada na lista de variáveis lidas.")
+        log.warning("Aviso: Nenhuma tag '_DCOM' do tipo 'WORD' foi localizada na lista de variáveis lidas.")
         return titulo_lido, MODELO
         
     else:
@@ -439,26 +1161,66 @@ def ler_titulo_modelo(caminho_arquivo_xef: str, lista_variaveis_lidas: List[Dict
 
 #----------------------GERAÇÃO DO ARQUIVO EXCEL----------------------------
 
-def gerar_excel(matriz_hardware, titulo_projeto, modelo_plc):
+def nome_arquivo_saida(titulo_projeto, extensao, pasta_saida=None):
+    """REMOTE_IO_[TITULO]_[AAAA-MM-DD][extensao], dentro de pasta_saida quando informada."""
     data_hoje = datetime.now().strftime("%Y-%m-%d")
-    nome_arquivo = f"REMOTE_IO_{titulo_projeto.upper()}_{data_hoje}.xlsx"
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Lista de IO"
+    nome_arquivo = f"REMOTE_IO_{titulo_projeto.upper()}_{data_hoje}{extensao}"
+    if pasta_saida:
+        nome_arquivo = os.path.join(pasta_saida, nome_arquivo)
+    return nome_arquivo
 
-    # --- CONFIGURAÇÕES DE IMPRESSÃO ---
-    ws.page_setup.paperSize = ws.PAPERSIZE_A4
-    ws.page_setup.orientation = ws.ORIENTATION_LANDSCAPE
+def _configurar_folha_lista_io(ws):
+    """Impressão (A4 paisagem, 1 página de largura) e larguras das colunas, comuns a todos os motores."""
+    from openpyxl.worksheet.worksheet import Worksheet
+
+    ws.page_setup.paperSize = Worksheet.PAPERSIZE_A4
+    ws.page_setup.orientation = Worksheet.ORIENTATION_LANDSCAPE
     ws.sheet_properties.pageSetUpPr.fitToPage = True
     ws.page_setup.fitToWidth = 1
-    ws.page_setup.fitToHeight = 0 
-    
+    ws.page_setup.fitToHeight = 0
+
     ws.page_margins.left = 0.5
     ws.page_margins.right = 0.5
     ws.page_margins.top = 0.5
     ws.page_margins.bottom = 0.5
 
+    # A=Borne, B=Bit, C=Tag, D...G=Comentário (no write_only, antes da primeira linha)
+    larguras = [10, 10, 30, 21, 21, 21, 21]
+    for i, w in enumerate(larguras):
+        ws.column_dimensions[chr(65+i)].width = w
+
+def _canal_na_planilha(nomes, comentarios, i):
+    """(tag, comentário) do borne i como sai na planilha: '-' no que está vazio ou além dos canais do cartão."""
+    if i < len(nomes):
+        return nomes[i] or "-", comentarios[i] or "-"
+    return "-", "-"
+
+def gerar_excel(matriz_hardware, titulo_projeto, modelo_plc, pasta_saida=None, motor="normal", revisoes=None,
+                workers=None, por_drop=False, canais_reais=False):
+    """
+    revisoes: {(drop, slot): 'AAAA-MM-DD'} para manter a data de revisão de blocos que não mudaram.
+    motor: 'normal', 'streaming' ou 'parallel' (ver gerar_excel_paralelo); por_drop=True
+    grava um workbook por drop e canais_reais=True só os bornes que cada cartão tem
+    (os dois sempre pelo motor paralelo); por_drop devolve a lista de arquivos.
+    """
+    if motor == "parallel" or por_drop or canais_reais:
+        return gerar_excel_paralelo(matriz_hardware, titulo_projeto, modelo_plc, pasta_saida, revisoes,
+                                    workers, por_drop, canais_reais)
+    if motor == "streaming":
+        return gerar_excel_streaming(matriz_hardware, titulo_projeto, modelo_plc, pasta_saida, revisoes)
+
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Border, Side, Font, PatternFill
+    from openpyxl.worksheet.pagebreak import Break # Import necessário para quebras de página
+
+    data_hoje = datetime.now().strftime("%Y-%m-%d")
+    nome_arquivo = nome_arquivo_saida(titulo_projeto, ".xlsx", pasta_saida)
+    
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Lista de IO"
+    _configurar_folha_lista_io(ws)
+
     # Estilos
     thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), 
                          top=Side(style='thin'), bottom=Side(style='thin'))
@@ -482,7 +1244,7 @@ def gerar_excel(matriz_hardware, titulo_projeto, modelo_plc):
             ws.cell(row=linha_atual, column=3, value=titulo_projeto).font = header_font
             ws.cell(row=linha_atual, column=4, value=f"Modelo\n{modelo_plc}").font = header_font
             ws.cell(row=linha_atual, column=5, value=f"Cartão\n{obj_slot.modelo}").font = header_font
-            ws.cell(row=linha_atual, column=6, value=f"Drop\n{num_drop:02d}").font = header_font
+            ws.cell(row=linha_atual, column=6, value=_rotulo_drop(num_drop)).font = header_font
             ws.cell(row=linha_atual, column=7, value=f"Slot\n{num_slot:02d}").font
             
 
@@ -495,7 +1257,8 @@ def gerar_excel(matriz_hardware, titulo_projeto, modelo_plc):
             ws.merge_cells(start_row=linha_atual+1, start_column=1, end_row=linha_atual+1, end_column=5)
             ws.cell(row=linha_atual+1, column=1, value="Entradas/Saídas Digitais ou Analógicas").alignment = center_aligned
             ws.merge_cells(start_row=linha_atual+1, start_column=6, end_row=linha_atual+1, end_column=7)
-            ws.cell(row=linha_atual+1, column=6, value=f"Revisão: {data_hoje}").alignment = center_aligned
+            data_revisao = (revisoes or {}).get((num_drop, num_slot), data_hoje)
+            ws.cell(row=linha_atual+1, column=6, value=f"Revisão: {data_revisao}").alignment = center_aligned
             
             for col in range(1, 8):
                 ws.cell(row=linha_atual+1, column=col).border = thin_border
@@ -514,7 +1277,7 @@ def gerar_excel(matriz_hardware, titulo_projeto, modelo_plc):
                 cell.fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
 
             # --- CANAIS (Preenchimento) ---
-            for i in range(32):
+            for i in range(CANAIS_POR_BLOCO):
                 r_idx = linha_atual + 3 + i
                 ws.row_dimensions[r_idx].height = 14.5 # Ajuste para caber no A4 Paisagem
                 
@@ -524,11 +1287,7 @@ def gerar_excel(matriz_hardware, titulo_projeto, modelo_plc):
                 # Bit (Coluna 2: Borne - 1)
                 ws.cell(row=r_idx, column=2, value=i).alignment = center_aligned
                 
-                tag = "-"
-                coment = "-"
-                if i < len(obj_slot.canais):
-                    tag = obj_slot.canais[i].nome or "-"
-                    coment = obj_slot.canais[i].comentario or "-"
+                tag, coment = _canal_na_planilha(obj_slot._nomes, obj_slot._comentarios, i)
 
                 # Tag (Coluna 3)
                 ws.cell(row=r_idx, column=3, value=tag).alignment = center_aligned
@@ -541,53 +1300,1800 @@ def gerar_excel(matriz_hardware, titulo_projeto, modelo_plc):
                     ws.cell(row=r_idx, column=col).border = thin_border
 
             # --- FINALIZAÇÃO DO SLOT ---
-            linha_atual += 35 
+            linha_atual += LINHAS_POR_SLOT 
             ws.row_breaks.append(Break(id=linha_atual-1))
 
-    # Ajuste final de colunas (A=Borne, B=Bit, C=Tag, D...G=Comentário)
-    larguras = [10, 10, 30, 21, 21, 21, 21] 
-    for i, w in enumerate(larguras):
-        ws.column_dimensions[chr(65+i)].width = w
-
     wb.save(nome_arquivo)
-    print(f"Arquivo único gerado: {nome_arquivo}")
-#----------------------MAIN----------------------------
-if __name__ == "__main__":
+    log.info("Arquivo único gerado: %s", nome_arquivo)
+    return nome_arquivo
 
-    # --- DEFINIÇÃO UNIVERSAL DO CAMINHO BASE ---
-    # Essa lógica funciona tanto para o script .py quanto para o executável .exe (frozen)
-    if getattr(sys, 'frozen', False):
-        # Se estiver rodando como executável (PyInstaller), usa o caminho do binário.
-        diretorio_script = os.path.dirname(sys.executable)
+def _criar_estilos_esqueleto(wb):
+    """
+    NamedStyles do esqueleto dos motores de fragmentos (ver _esqueleto_lista_io),
+    equivalentes às combinações de Font/Alignment/Border/Fill de gerar_excel.
+    """
+    from openpyxl.styles import Alignment, Border, Side, Font, PatternFill, NamedStyle
+    from openpyxl.styles.fonts import DEFAULT_FONT
+
+    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                         top=Side(style='thin'), bottom=Side(style='thin'))
+    header_font = Font(bold=True, size=10)
+    center_aligned = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    left_aligned = Alignment(horizontal='left', vertical='center', wrap_text=True, indent=1)
+    cinza = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
+
+    definicoes = {
+        'rio_cabecalho':        dict(font=header_font, alignment=center_aligned, border=thin_border),
+        'rio_centro':           dict(font=copy(DEFAULT_FONT), alignment=center_aligned, border=thin_border),
+        'rio_esquerda':         dict(font=copy(DEFAULT_FONT), alignment=left_aligned, border=thin_border),
+        'rio_borda':            dict(font=copy(DEFAULT_FONT), border=thin_border),
+        'rio_titulo_tabela':    dict(font=header_font, alignment=center_aligned, border=thin_border, fill=cinza),
+        'rio_titulo_tabela_n':  dict(font=copy(DEFAULT_FONT), alignment=center_aligned, border=thin_border, fill=cinza),
+    }
+    for nome, atributos in definicoes.items():
+        wb.add_named_style(NamedStyle(name=nome, **atributos))
+
+def gerar_excel_streaming(matriz_hardware, titulo_projeto, modelo_plc, pasta_saida=None, revisoes=None):
+    """
+    Mesmo layout de gerar_excel sem montar a planilha em memória: o esqueleto
+    (estilos, mesclagens, quebras) vem de _esqueleto_lista_io e cada drop vira
+    um fragmento <row> (_xml_linhas_drop) gravado no zip assim que gerado. É o
+    motor 'parallel' sem o pool; a memória não cresce com a quantidade de slots.
+    """
+    data_hoje = datetime.now().strftime("%Y-%m-%d")
+    nome_arquivo = nome_arquivo_saida(titulo_projeto, ".xlsx", pasta_saida)
+
+    tarefas = _tarefas_por_drop(matriz_hardware, revisoes, data_hoje)
+    esqueleto, estilos = _esqueleto_xlsx(_blocos_das_tarefas(tarefas))
+    fragmentos = (_xml_linhas_drop(num_drop, slots, titulo_projeto, modelo_plc, inicio, estilos)
+                  for num_drop, slots, inicio in tarefas)
+    _gravar_xlsx_com_linhas(esqueleto, fragmentos, nome_arquivo)
+    log.info("Arquivo único gerado: %s", nome_arquivo)
+    return nome_arquivo
+
+def _escapar_xml(texto):
+    return texto.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _xml_linhas_drop(num_drop, slots, titulo_projeto, modelo_plc, linha_inicial, estilos):
+    """
+    Gera o XML (<row>...</row>) de todos os slots de um drop, a partir de dados
+    simples (picklable), para rodar em um processo do pool. 'slots' é uma lista
+    de (num_slot, modelo, nomes, comentarios, data_revisao, bornes) e 'estilos'
+    mapeia o nome do NamedStyle para o índice de estilo do workbook final. Com
+    bornes=32 o layout é o mesmo de gerar_excel, célula por célula.
+    """
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    from openpyxl.utils.exceptions import IllegalCharacterError
+
+    partes = []
+    colunas = "ABCDEFG"
+
+    def linha(r_idx, celulas, altura=False):
+        partes.append(f'<row r="{r_idx}" ht="14.5" customHeight="1">' if altura else f'<row r="{r_idx}">')
+        for col, (valor, estilo) in zip(colunas, celulas):
+            ref = f'{col}{r_idx}'
+            s = estilos[estilo]
+            if valor is None:
+                partes.append(f'<c r="{ref}" s="{s}" t="n" />')
+            elif isinstance(valor, int):
+                partes.append(f'<c r="{ref}" s="{s}" t="n"><v>{valor}</v></c>')
+            else:
+                if ILLEGAL_CHARACTERS_RE.search(valor):
+                    raise IllegalCharacterError(f"{valor} cannot be used in worksheets.")
+                espaco = ' xml:space="preserve"' if valor != valor.strip() else ''
+                partes.append(f'<c r="{ref}" s="{s}" t="inlineStr"><is><t{espaco}>{_escapar_xml(valor)}</t></is></c>')
+        partes.append('</row>')
+
+    linha_atual = linha_inicial
+    for num_slot, modelo, nomes, comentarios, data_revisao, bornes in slots:
+        linha(linha_atual, [
+            ("VALE", 'rio_cabecalho'), (None, 'rio_centro'), (titulo_projeto, 'rio_cabecalho'),
+            (f"Modelo\n{modelo_plc}", 'rio_cabecalho'), (f"Cartão\n{modelo}", 'rio_cabecalho'),
+            (_rotulo_drop(num_drop), 'rio_cabecalho'), (f"Slot\n{num_slot:02d}", 'rio_centro'),
+        ])
+        linha(linha_atual + 1, [
+            ("Entradas/Saídas Digitais ou Analógicas", 'rio_centro'), (None, 'rio_borda'), (None, 'rio_borda'),
+            (None, 'rio_borda'), (None, 'rio_borda'), (f"Revisão: {data_revisao}", 'rio_centro'), (None, 'rio_borda'),
+        ])
+        linha(linha_atual + 2, [
+            ("BORNE", 'rio_titulo_tabela'), ("BIT", 'rio_titulo_tabela'), ("TAG Equipamento", 'rio_titulo_tabela'),
+            ("DESCRIÇÃO / COMENTÁRIO", 'rio_titulo_tabela'), (None, 'rio_titulo_tabela_n'),
+            (None, 'rio_titulo_tabela_n'), (None, 'rio_titulo_tabela_n'),
+        ])
+        for i in range(bornes):
+            tag, coment = _canal_na_planilha(nomes, comentarios, i)
+            linha(linha_atual + 3 + i, [
+                (i+1, 'rio_centro'), (i, 'rio_centro'), (tag, 'rio_centro'), (coment, 'rio_esquerda'),
+                (None, 'rio_borda'), (None, 'rio_borda'), (None, 'rio_borda'),
+            ], altura=True)
+        linha_atual += 3 + bornes
+    return "".join(partes).encode("utf-8")
+
+def _esqueleto_lista_io(blocos):
+    """
+    Workbook write_only com tudo o que não é linha: estilos, colunas, impressão,
+    mesclagens e quebras de página dos blocos [(linha_inicial, [bornes de cada slot])].
+    Devolve (wb, estilos), com estilos = {NamedStyle: índice 's' das células}.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+    from openpyxl.worksheet.pagebreak import Break
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Lista de IO")
+    _criar_estilos_esqueleto(wb)
+    _configurar_folha_lista_io(ws)
+
+    mesclagens = []
+    for linha_inicial, bornes_por_slot in blocos:
+        r = linha_inicial
+        for bornes in bornes_por_slot:
+            mesclagens += [f"A{r}:B{r}", f"A{r+1}:E{r+1}", f"F{r+1}:G{r+1}", f"D{r+2}:G{r+2}"]
+            mesclagens += [f"D{r_idx}:G{r_idx}" for r_idx in range(r + 3, r + 3 + bornes)]
+            ws.row_breaks.append(Break(id=r + 3 + bornes - 1))
+            r += 3 + bornes
+    ws.merged_cells = MultiCellRange([CellRange(m) for m in mesclagens])
+
+    # Ordem de primeiro uso das células (cabeçalho, linha 2, títulos, bornes): fixa o styles.xml
+    estilos = {}
+    for nome in ('rio_cabecalho', 'rio_centro', 'rio_borda', 'rio_titulo_tabela', 'rio_titulo_tabela_n', 'rio_esquerda'):
+        c = WriteOnlyCell(ws)
+        c.style = nome
+        estilos[nome] = c.style_id
+    return wb, estilos
+
+def _esqueleto_xlsx(blocos):
+    """O .xlsx do esqueleto (ver _esqueleto_lista_io) já salvo em bytes, com os estilos: picklable para outro processo."""
+    import io
+
+    wb, estilos = _esqueleto_lista_io(blocos)
+    esqueleto = io.BytesIO()
+    wb.save(esqueleto)
+    return esqueleto.getvalue(), estilos
+
+def _montar_xlsx_com_linhas(esqueleto, fragmentos, destino):
+    """
+    Copia o zip do esqueleto para 'destino' (caminho ou arquivo aberto, ex.: BytesIO)
+    com os fragmentos <row> dentro do <sheetData>. 'fragmentos' pode ser qualquer
+    iterável (ex.: uma fila).
+    """
+    import io
+    import zipfile
+
+    with zipfile.ZipFile(io.BytesIO(esqueleto)) as origem, \
+         zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as saida:
+        for info in origem.infolist():
+            conteudo = origem.read(info.filename)
+            if info.filename != "xl/worksheets/sheet1.xml":
+                saida.writestr(info, conteudo)
+                continue
+            # Sem linhas o openpyxl grava <sheetData></sheetData> (ou <sheetData />)
+            antes, _, depois = re.split(rb"(<sheetData\s*/>|<sheetData></sheetData>)", conteudo, maxsplit=1)
+            with saida.open(info.filename, "w") as f:
+                f.write(antes)
+                f.write(b"<sheetData>")
+                for fragmento in fragmentos:
+                    f.write(fragmento)
+                f.write(b"</sheetData>")
+                f.write(depois)
+
+def _gravar_xlsx_com_linhas(esqueleto, fragmentos, nome_arquivo):
+    """
+    Grava o .xlsx final (ver _montar_xlsx_com_linhas) em um temporário e troca de
+    uma vez; se os fragmentos falharem o temporário é apagado e o arquivo final
+    não é tocado.
+    """
+    temporario = f"{nome_arquivo}.{os.getpid()}.tmp"
+    try:
+        _montar_xlsx_com_linhas(esqueleto, fragmentos, temporario)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    os.replace(temporario, nome_arquivo)
+
+def _tarefas_por_drop(matriz_hardware, revisoes, data_hoje, por_drop=False, canais_reais=False):
+    """
+    [(num_drop, slots, linha_inicial)] na ordem da planilha, com slots no formato
+    de _xml_linhas_drop. Com por_drop os drops vazios saem e todos começam na linha 1.
+    canais_reais=True imprime só os bornes que o cartão tem (qtd_canais) em vez de 32.
+    """
+    tarefas = []
+    linha_atual = 1
+    for num_drop in sorted(matriz_hardware.keys()):
+        obj_drop = matriz_hardware[num_drop]
+        slots = []
+        for num_slot in sorted(obj_drop.slots.keys()):
+            if num_slot < 3:
+                continue
+            obj_slot = obj_drop.slots[num_slot]
+            slots.append((num_slot, obj_slot.modelo, obj_slot._nomes, obj_slot._comentarios,
+                          (revisoes or {}).get((num_drop, num_slot), data_hoje),
+                          obj_slot.qtd_canais if canais_reais else CANAIS_POR_BLOCO))
+        if not slots and por_drop:
+            continue
+        tarefas.append((num_drop, slots, 1 if por_drop else linha_atual))
+        linha_atual += sum(3 + slot[5] for slot in slots)
+    return tarefas
+
+def _blocos_das_tarefas(tarefas):
+    """Blocos de _esqueleto_lista_io: (linha_inicial, [bornes de cada slot]) por drop."""
+    return [(inicio, [slot[5] for slot in slots]) for _, slots, inicio in tarefas]
+
+def gerar_excel_paralelo(matriz_hardware, titulo_projeto, modelo_plc, pasta_saida=None, revisoes=None,
+                         workers=None, por_drop=False, canais_reais=False):
+    """
+    Mesmo layout de gerar_excel, dividido por drop: os deslocamentos de linha de
+    cada drop saem da lista ordenada de slots, cada drop vira um fragmento XML
+    em um pool de processos e o workbook é montado em uma gravação sequencial.
+    Com por_drop=True grava um workbook por drop (REMOTE_IO_[TITULO]_DROP02_...)
+    e devolve a lista de arquivos. canais_reais: ver _tarefas_por_drop.
+    """
+    data_hoje = datetime.now().strftime("%Y-%m-%d")
+
+    # Trabalho de cada drop, com a linha inicial já calculada
+    tarefas = _tarefas_por_drop(matriz_hardware, revisoes, data_hoje, por_drop, canais_reais)
+
+    # Os índices de estilo são os mesmos em todo esqueleto (mesma ordem de criação)
+    blocos = _blocos_das_tarefas(tarefas)
+    esqueleto, estilos = _esqueleto_xlsx([] if por_drop else blocos)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(tarefas))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = [executor.submit(_xml_linhas_drop, num_drop, slots, titulo_projeto, modelo_plc, inicio, estilos)
+                       for num_drop, slots, inicio in tarefas]
+            fragmentos = [f.result() for f in futuros]
     else:
-        # Se estiver rodando como script Python (.py), usa o caminho do arquivo de script.
-        # É fundamental usar o try-except ou um método robusto para evitar erros ao ser chamado de outro diretório.
+        fragmentos = [_xml_linhas_drop(num_drop, slots, titulo_projeto, modelo_plc, inicio, estilos)
+                      for num_drop, slots, inicio in tarefas]
+    PERFIL.contar("drops_paralelos", len(tarefas))
+
+    if por_drop:
+        arquivos = []
+        for (num_drop, slots, inicio), bloco, fragmento in zip(tarefas, blocos, fragmentos):
+            nome_arquivo = nome_arquivo_saida(f"{titulo_projeto}_DROP{num_drop:02d}", ".xlsx", pasta_saida)
+            _gravar_xlsx_com_linhas(_esqueleto_xlsx([bloco])[0], [fragmento], nome_arquivo)
+            log.info("Arquivo do drop %02d gerado: %s", num_drop, nome_arquivo)
+            arquivos.append(nome_arquivo)
+        return arquivos
+
+    nome_arquivo = nome_arquivo_saida(titulo_projeto, ".xlsx", pasta_saida)
+    _gravar_xlsx_com_linhas(esqueleto, fragmentos, nome_arquivo)
+    log.info("Arquivo único gerado: %s", nome_arquivo)
+    return nome_arquivo
+
+_FIM_DA_FILA = None
+
+def _fragmentos_da_fila(fila):
+    """Itera os fragmentos da fila até _FIM_DA_FILA; uma exceção na fila aborta a gravação."""
+    while True:
+        item = fila.get()
+        if item is _FIM_DA_FILA:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+class EscritorPipeline:
+    """
+    Planilha do modo --pipeline (mesmo .xlsx do motor 'parallel'). Assim que o
+    hardware do .xef é lido, iniciar() manda montar o esqueleto (estilos,
+    mesclagens, quebras de página) em outro processo enquanto as variáveis
+    ainda estão sendo lidas e cruzadas. Em concluir() cada drop já resolvido
+    vira um fragmento <row> e segue por uma fila para a thread que comprime e
+    grava o zip, em paralelo com a geração dos drops seguintes.
+    usar_processo=False monta o esqueleto em uma thread (ex.: dentro do lote,
+    que já ocupa um processo por arquivo).
+    """
+    def __init__(self, usar_processo=True, canais_reais=False):
+        self.usar_processo = usar_processo
+        self.canais_reais = canais_reais
+        self.blocos = None
+        self._executor = None
+        self._esqueleto = None  # Future de (bytes do esqueleto, estilos)
+
+    @property
+    def iniciado(self):
+        return self._esqueleto is not None
+
+    def iniciar(self, matriz_hardware):
+        """Agenda o esqueleto a partir da quantidade de slots de cada drop."""
+        if self.usar_processo:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=1)
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        tarefas = _tarefas_por_drop(matriz_hardware, None, "", canais_reais=self.canais_reais)
+        self.blocos = _blocos_das_tarefas(tarefas)
+        self._esqueleto = self._executor.submit(_esqueleto_xlsx, self.blocos)
+        log.debug("Pipeline: esqueleto de %s drop(s) agendado.", len(self.blocos))
+
+    def concluir(self, matriz_hardware, titulo_projeto, modelo_plc, pasta_saida=None, revisoes=None):
+        """Gera os drops, alimenta a thread de gravação e devolve o nome do .xlsx."""
+        import queue
+        import threading
+
+        if not self.iniciado:
+            self.iniciar(matriz_hardware)
+        data_hoje = datetime.now().strftime("%Y-%m-%d")
+        tarefas = _tarefas_por_drop(matriz_hardware, revisoes, data_hoje, canais_reais=self.canais_reais)
+        if _blocos_das_tarefas(tarefas) != self.blocos:
+            raise RuntimeError("Pipeline: os slots da matriz mudaram depois da leitura do hardware.")
+
+        with PERFIL.etapa("pipeline_espera_esqueleto"):
+            esqueleto, estilos = self._esqueleto.result()
+        nome_arquivo = nome_arquivo_saida(titulo_projeto, ".xlsx", pasta_saida)
+        fila = queue.Queue()
+        erro = []
+
+        def gravar():
+            try:
+                _gravar_xlsx_com_linhas(esqueleto, _fragmentos_da_fila(fila), nome_arquivo)
+            except BaseException as e:
+                erro.append(e)
+
+        escritor = threading.Thread(target=gravar, name="EscritorPipeline", daemon=True)
+        escritor.start()
         try:
-            diretorio_script = os.path.dirname(os.path.abspath(__file__))
-        except NameError:
-            # Fallback caso __file__ não esteja definido (raro, mas seguro)
-            diretorio_script = os.path.getcwd() 
+            for num_drop, slots, inicio in tarefas:
+                fila.put(_xml_linhas_drop(num_drop, slots, titulo_projeto, modelo_plc, inicio, estilos))
+            fila.put(_FIM_DA_FILA)
+        except BaseException as e:
+            fila.put(e)
+            raise
+        finally:
+            escritor.join()
+            self.encerrar()
+        if erro:
+            raise erro[0]
+        PERFIL.contar("drops_pipeline", len(tarefas))
+        log.info("Arquivo único gerado: %s", nome_arquivo)
+        return nome_arquivo
+
+    def encerrar(self):
+        """
+        Libera o processo/thread do esqueleto. Se o processamento falhar antes de
+        concluir(), o executor é liberado quando o escritor é coletado.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+#----------------------EXPORTAÇÃO TABULAR (CSV / JSON LINES / PARQUET)----------------------------
+
+FORMATOS_SAIDA = ("xlsx", "csv", "jsonl", "parquet")
+COLUNAS_EXPORTACAO = ("projeto", "drop", "slot", "cartao", "borne", "bit", "tag", "comentario", "endereco")
+
+def _valor_exportado(valor):
+    """O '-' da planilha (PLACEHOLDER) e o texto vazio saem como ausentes (None): nenhum importador cria a tag '-'."""
+    return None if valor in (PLACEHOLDER, "") else valor
+
+def iterar_canais(matriz_hardware, titulo_projeto):
+    """
+    Uma tupla (COLUNAS_EXPORTACAO) por canal real de cada cartão, em ordem de drop/slot.
+    Tag, comentário e endereço sem valor vêm como None (vazio no CSV, null no JSON).
+    """
+    for num_drop in sorted(matriz_hardware.keys()):
+        obj_drop = matriz_hardware[num_drop]
+        for num_slot in sorted(obj_drop.slots.keys()):
+            obj_slot = obj_drop.slots[num_slot]
+            for i in range(obj_slot.qtd_canais):
+                yield (titulo_projeto, num_drop, num_slot, obj_slot.modelo, i + 1, i,
+                       _valor_exportado(obj_slot._nomes[i]), _valor_exportado(obj_slot._comentarios[i]),
+                       _valor_exportado(obj_slot.endereco_canal(i)))
+
+def exportar_csv(matriz_hardware, titulo_projeto, pasta_saida=None):
+    nome_arquivo = nome_arquivo_saida(titulo_projeto, ".csv", pasta_saida)
+    # ';' e BOM para o Excel em pt-BR abrir direto
+    with open(nome_arquivo, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(COLUNAS_EXPORTACAO)
+        writer.writerows(iterar_canais(matriz_hardware, titulo_projeto))
+    log.info("Arquivo CSV gerado: %s", nome_arquivo)
+    return nome_arquivo
+
+def exportar_jsonl(matriz_hardware, titulo_projeto, pasta_saida=None):
+    nome_arquivo = nome_arquivo_saida(titulo_projeto, ".jsonl", pasta_saida)
+    with open(nome_arquivo, "w", encoding="utf-8") as f:
+        for linha in iterar_canais(matriz_hardware, titulo_projeto):
+            f.write(json.dumps(dict(zip(COLUNAS_EXPORTACAO, linha)), ensure_ascii=False))
+            f.write("\n")
+    log.info("Arquivo JSON Lines gerado: %s", nome_arquivo)
+    return nome_arquivo
+
+def exportar_parquet(matriz_hardware, titulo_projeto, pasta_saida=None):
+    """Parquet colunar, gravado em um row group por drop. Requer pyarrow (opcional)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("A saída parquet precisa do pacote pyarrow (pip install pyarrow).")
+
+    esquema = pa.schema([("projeto", pa.string()), ("drop", pa.int32()), ("slot", pa.int32()),
+                         ("cartao", pa.string()), ("borne", pa.int32()), ("bit", pa.int32()),
+                         ("tag", pa.string()), ("comentario", pa.string()), ("endereco", pa.string())])
+    nome_arquivo = nome_arquivo_saida(titulo_projeto, ".parquet", pasta_saida)
+    with pq.ParquetWriter(nome_arquivo, esquema) as writer:
+        for num_drop in sorted(matriz_hardware.keys()):
+            linhas = list(iterar_canais({num_drop: matriz_hardware[num_drop]}, titulo_projeto))
+            if linhas:
+                colunas = list(zip(*linhas))
+                writer.write_table(pa.table([list(c) for c in colunas], schema=esquema))
+    log.info("Arquivo Parquet gerado: %s", nome_arquivo)
+    return nome_arquivo
+
+EXPORTADORES = {
+    "csv": exportar_csv,
+    "jsonl": exportar_jsonl,
+    "parquet": exportar_parquet,
+}
 
-    # --- Configuração de Caminhos ---
-    caminho_unitpro = os.path.join(diretorio_script, ARQUIVO_UNITPRO)
+#----------------------REGERAÇÃO INCREMENTAL----------------------------
+
+def _linhas_do_slot(obj_slot):
+    """As 32 linhas (tag, comentário) exatamente como aparecem na planilha."""
+    return [_canal_na_planilha(obj_slot._nomes, obj_slot._comentarios, i) for i in range(CANAIS_POR_BLOCO)]
+
+NS_PLANILHA = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_RELACOES = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PACOTE = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+def _coluna_da_referencia(ref):
+    """'D12' -> 3 (índice da coluna a partir de 0)."""
+    coluna = 0
+    for letra in ref:
+        if not letra.isalpha():
+            break
+        coluna = coluna * 26 + ord(letra.upper()) - 64
+    return coluna - 1
+
+def _linhas_xlsx(caminho_xlsx, colunas=7):
+    """
+    Valores das primeiras 'colunas' colunas da planilha ativa, uma tupla por linha
+    (linhas ausentes viram tuplas de None), como o iter_rows(values_only=True) do
+    openpyxl. O XML é lido direto do zip com iterparse, sem criar células: em
+    planilhas de centenas de slots é várias vezes mais rápido que o read_only.
+    """
+    import zipfile
+    import posixpath
+
+    try:
+        arquivo_zip = zipfile.ZipFile(caminho_xlsx)
+    except zipfile.BadZipFile:
+        raise ValueError(f"{caminho_xlsx} não é uma planilha .xlsx") from None
+    with arquivo_zip as z:
+        # Planilha ativa: workbookView/activeTab -> sheet r:id -> alvo no workbook.xml.rels
+        livro = ET.fromstring(z.read("xl/workbook.xml"))
+        visao = livro.find(f"{NS_PLANILHA}bookViews/{NS_PLANILHA}workbookView")
+        folhas = livro.findall(f"{NS_PLANILHA}sheets/{NS_PLANILHA}sheet")
+        ativa = int(visao.get("activeTab", 0)) if visao is not None else 0
+        id_folha = folhas[min(ativa, len(folhas) - 1)].get(f"{NS_RELACOES}id")
+        relacoes = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+        alvo = next(r.get("Target") for r in relacoes.iter(f"{NS_PACOTE}Relationship") if r.get("Id") == id_folha)
+        caminho_folha = alvo.lstrip("/") if alvo.startswith("/") else posixpath.normpath(posixpath.join("xl", alvo))
+
+        compartilhadas = []
+        if "xl/sharedStrings.xml" in z.namelist():
+            with z.open("xl/sharedStrings.xml") as f:
+                for _, elem in ET.iterparse(f):
+                    if elem.tag == f"{NS_PLANILHA}si":
+                        compartilhadas.append("".join(t.text or "" for t in elem.iter(f"{NS_PLANILHA}t")))
+                        elem.clear()
+
+        linhas = []
+        with z.open(caminho_folha) as f:
+            for _, elem in ET.iterparse(f):
+                if elem.tag != f"{NS_PLANILHA}row":
+                    continue
+                numero = int(elem.get("r", len(linhas) + 1))
+                linhas.extend([(None,) * colunas] * (numero - 1 - len(linhas)))
+                valores = [None] * colunas
+                for posicao, c in enumerate(elem.iter(f"{NS_PLANILHA}c")):
+                    col = _coluna_da_referencia(c.get("r")) if c.get("r") else posicao
+                    if col >= colunas:
+                        continue
+                    tipo = c.get("t", "n")
+                    if tipo == "inlineStr":
+                        valores[col] = "".join(t.text or "" for t in c.iter(f"{NS_PLANILHA}t"))
+                        continue
+                    v = c.findtext(f"{NS_PLANILHA}v")
+                    if v is None:
+                        continue
+                    if tipo == "s":
+                        valores[col] = compartilhadas[int(v)]
+                    elif tipo == "n":
+                        numero_celula = float(v)
+                        valores[col] = int(numero_celula) if numero_celula.is_integer() and "." not in v else numero_celula
+                    elif tipo == "b":
+                        valores[col] = v == "1"
+                    else:  # str, e (erro)
+                        valores[col] = v
+                linhas.append(tuple(valores))
+                elem.clear()
+    return linhas
+
+def impressao_slot(cartao, canais):
+    """Hash do que identifica o conteúdo de um slot na planilha: cartão e as 32 linhas (tag, comentário)."""
+    h = hashlib.blake2b(str(cartao).encode("utf-8"), digest_size=16)
+    for tag, coment in canais:
+        h.update(f"\x1e{tag}\x1f{coment}".encode("utf-8"))
+    return h.digest()
+
+def ler_planilha_remote_io(caminho_xlsx):
+    """
+    Lê uma planilha REMOTE_IO gerada por gerar_excel e devolve
+    {(drop, slot): {'linha', 'titulo', 'modelo_plc', 'cartao', 'revisao', 'canais': [(tag, coment) x32],
+    'impressao'}}; 'impressao' é a de impressao_slot, para comparar slots sem olhar canal por canal.
+    """
+    linhas = _linhas_xlsx(caminho_xlsx)
+
+    blocos = {}
+    for idx, r in enumerate(linhas):
+        cartao, drop, slot = r[4], r[5], r[6]
+        if not (isinstance(cartao, str) and cartao.startswith("Cartão\n")
+                and isinstance(drop, str) and isinstance(slot, str) and slot.startswith("Slot\n")):
+            continue
+        num_drop = _drop_do_rotulo(drop)
+        try:
+            chave = (num_drop, int(slot.split("\n", 1)[1]))
+        except ValueError:
+            continue
+        if num_drop is None:
+            continue
+        revisao = None
+        if idx + 1 < len(linhas) and isinstance(linhas[idx + 1][5], str):
+            revisao = linhas[idx + 1][5].replace("Revisão:", "").strip()
+        canais = []
+        for i in range(CANAIS_POR_BLOCO):
+            linha = linhas[idx + 3 + i] if idx + 3 + i < len(linhas) else (None,) * 7
+            if linha[0] != i + 1:
+                # Planilha com --real-channels: o bloco acaba antes do fim do bloco
+                canais.extend([("-", "-")] * (CANAIS_POR_BLOCO - i))
+                break
+            canais.append((linha[2] if linha[2] is not None else "-", linha[3] if linha[3] is not None else "-"))
+        modelo_plc = r[3].split("\n", 1)[1] if isinstance(r[3], str) and "\n" in r[3] else r[3]
+        blocos[chave] = {
+            'linha': idx + 1,
+            'titulo': r[2],
+            'modelo_plc': modelo_plc,
+            'cartao': cartao.split("\n", 1)[1],
+            'revisao': revisao,
+            'canais': canais,
+            'impressao': impressao_slot(cartao.split("\n", 1)[1], canais),
+        }
+    return blocos
+
+def comparar_com_planilha(matriz_hardware, titulo_projeto, modelo_plc, blocos_anteriores, data_hoje,
+                          canais_reais=False):
+    """
+    Compara a matriz nova com os blocos da planilha anterior.
+    Retorna (revisoes, alteracoes): a data de revisão de cada bloco (a antiga quando
+    nada mudou, data_hoje quando mudou) e a lista de células alteradas.
+    canais_reais: a planilha nova terá só os bornes reais (muda as células do relatório).
+    """
+    revisoes = {}
+    alteracoes = []  # (drop, slot, indice do canal, campo, anterior, novo, celula)
+    linha_atual = 1
+    vistos = set()
+
+    for num_drop in sorted(matriz_hardware.keys()):
+        obj_drop = matriz_hardware[num_drop]
+        for num_slot in sorted(obj_drop.slots.keys()):
+            if num_slot < 3:
+                continue
+            obj_slot = obj_drop.slots[num_slot]
+            chave = (num_drop, num_slot)
+            vistos.add(chave)
+            anterior = blocos_anteriores.get(chave)
+            mudancas = []
+
+            if anterior is None:
+                mudancas.append((num_drop, num_slot, None, "bloco", None, "novo", f"A{linha_atual}"))
+            else:
+                for campo, antigo, novo, col in (("titulo", anterior['titulo'], titulo_projeto, "C"),
+                                                 ("modelo_plc", anterior['modelo_plc'], modelo_plc, "D"),
+                                                 ("cartao", anterior['cartao'], obj_slot.modelo, "E")):
+                    if antigo != novo:
+                        mudancas.append((num_drop, num_slot, None, campo, antigo, novo, f"{col}{linha_atual}"))
+                for i, (novo, velho) in enumerate(zip(_linhas_do_slot(obj_slot), anterior['canais'])):
+                    r_idx = linha_atual + 3 + i
+                    if novo[0] != velho[0]:
+                        mudancas.append((num_drop, num_slot, i, "tag", velho[0], novo[0], f"C{r_idx}"))
+                    if novo[1] != velho[1]:
+                        mudancas.append((num_drop, num_slot, i, "comentario", velho[1], novo[1], f"D{r_idx}"))
+
+            if mudancas or anterior is None or not anterior['revisao']:
+                revisoes[chave] = data_hoje
+            else:
+                revisoes[chave] = anterior['revisao']
+            alteracoes.extend(mudancas)
+            linha_atual += 3 + (obj_slot.qtd_canais if canais_reais else CANAIS_POR_BLOCO)
+
+    for chave in sorted(set(blocos_anteriores) - vistos):
+        alteracoes.append((chave[0], chave[1], None, "bloco", "removido", None, None))
+
+    return revisoes, alteracoes
+
+def gravar_relatorio_alteracoes(alteracoes, caminho_csv):
+    with open(caminho_csv, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Drop", "Slot", "Borne", "Campo", "Anterior", "Novo", "Celula"])
+        for drop, slot, canal, campo, antigo, novo, celula in alteracoes:
+            writer.writerow([drop, slot, "" if canal is None else canal + 1, campo,
+                             "" if antigo is None else antigo, "" if novo is None else novo, celula or ""])
+
+#----------------------VALIDAÇÃO CONTRA A PLANILHA DE CAMPO----------------------------
+
+def validar_planilha(matriz_hardware, blocos_planilha):
+    """
+    Compara a matriz montada do .xef com os blocos de uma planilha REMOTE_IO
+    assinada (ver ler_planilha_remote_io). Só os slots cuja impressao_slot difere
+    são comparados canal a canal. Título, modelo do PLC e data de revisão não
+    entram: a planilha de campo costuma ter outro título/revisão.
+    Retorna (diferencas, resumo), com diferencas = [(situacao, drop, slot,
+    indice do canal, campo, planilha, xef)] e situacao 'adicionado' (só no .xef),
+    'removido' (só na planilha) ou 'alterado'.
+    """
+    diferencas = []
+    resumo = {'iguais': 0, 'alterados': 0, 'adicionados': 0, 'removidos': 0}
+    vistos = set()
+
+    for num_drop in sorted(matriz_hardware.keys()):
+        obj_drop = matriz_hardware[num_drop]
+        for num_slot in sorted(obj_drop.slots.keys()):
+            if num_slot < 3:
+                continue
+            obj_slot = obj_drop.slots[num_slot]
+            chave = (num_drop, num_slot)
+            vistos.add(chave)
+            bloco = blocos_planilha.get(chave)
+            if bloco is None:
+                diferencas.append(("adicionado", num_drop, num_slot, None, "cartao", None, obj_slot.modelo))
+                resumo['adicionados'] += 1
+                continue
+            linhas = _linhas_do_slot(obj_slot)
+            if impressao_slot(obj_slot.modelo, linhas) == bloco['impressao']:
+                resumo['iguais'] += 1
+                continue
+
+            resumo['alterados'] += 1
+            if bloco['cartao'] != obj_slot.modelo:
+                diferencas.append(("alterado", num_drop, num_slot, None, "cartao", bloco['cartao'], obj_slot.modelo))
+            for i, (novo, velho) in enumerate(zip(linhas, bloco['canais'])):
+                if novo[0] != velho[0]:
+                    diferencas.append(("alterado", num_drop, num_slot, i, "tag", velho[0], novo[0]))
+                if novo[1] != velho[1]:
+                    diferencas.append(("alterado", num_drop, num_slot, i, "comentario", velho[1], novo[1]))
+
+    for chave in sorted(set(blocos_planilha) - vistos):
+        diferencas.append(("removido", chave[0], chave[1], None, "cartao", blocos_planilha[chave]['cartao'], None))
+        resumo['removidos'] += 1
+
+    return diferencas, resumo
+
+def gravar_relatorio_validacao(diferencas, caminho_csv):
+    with open(caminho_csv, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Situacao", "Drop", "Slot", "Borne", "Campo", "Planilha", "XEF"])
+        for situacao, drop, slot, canal, campo, planilha, xef in diferencas:
+            writer.writerow([situacao, drop, slot, "" if canal is None else canal + 1, campo,
+                             "" if planilha is None else planilha, "" if xef is None else xef])
+
+def _validar_cli(argv):
+    """Subcomando: Remote_IO_automatico validar PROJETO.xef REMOTE_IO_....xlsx [--csv RELATORIO]"""
+    parser = argparse.ArgumentParser(prog="Remote_IO_automatico validar",
+                                     description="Compara um .xef com uma planilha REMOTE_IO existente "
+                                                 "(as-built de campo) e lista slots adicionados/removidos/alterados.")
+    parser.add_argument("xef", help="Exportação .xef do Unity Pro")
+    parser.add_argument("planilha", help="Planilha REMOTE_IO_*.xlsx de referência")
+    parser.add_argument("--csv", dest="relatorio", default=None,
+                        help="Grava as diferenças em CSV (padrão: REMOTE_IO_[TITULO]_[DATA]_validacao.csv)")
+    parser.add_argument("--no-cache", dest="usar_cache", action="store_false",
+                        help="Ignora o cache do modelo e relê o .xef do zero")
+    parser.add_argument("--cache-dir", dest="pasta_cache", default=None, help="Diretório do cache do modelo")
+    parser.add_argument("--low-memory", dest="memoria_limitada", action="store_true",
+                        help="Lê o .xef com memória limitada")
+    parser.add_argument("--catalog", dest="arquivo_catalogo", default=None, metavar="JSON",
+                        help=f"Catálogo de cartões (padrão: {ARQUIVO_CATALOGO} ao lado do programa, se existir; "
+                             "senão o empacotado com ele)")
+    parser.add_argument("--json", dest="saida_json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="%(message)s", level=logging.WARNING)
+
+    inicio = time.perf_counter()
+    try:
+        arquivo_catalogo = args.arquivo_catalogo or _catalogo_padrao(_diretorio_programa())
+        if arquivo_catalogo:
+            usar_catalogo(arquivo_catalogo)
+        if args.usar_cache:
+            modelo = carregar_modelo_com_cache(args.xef, args.pasta_cache, args.memoria_limitada)
+        else:
+            modelo = montar_modelo(args.xef, args.memoria_limitada)
+        blocos = ler_planilha_remote_io(args.planilha)
+    except (OSError, ValueError, ET.ParseError, KeyError) as e:
+        parser.error(f"{type(e).__name__}: {e}")
+    diferencas, resumo = validar_planilha(modelo['matriz'], blocos)
+    decorrido = time.perf_counter() - inicio
+
+    if diferencas:
+        relatorio = args.relatorio or nome_arquivo_saida(modelo['titulo'], "_validacao.csv")
+        gravar_relatorio_validacao(diferencas, relatorio)
+    if args.saida_json:
+        print(json.dumps({'resumo': resumo, 'diferencas': [
+            dict(zip(("situacao", "drop", "slot", "borne", "campo", "planilha", "xef"),
+                     (d[0], d[1], d[2], None if d[3] is None else d[3] + 1) + d[4:]))
+            for d in diferencas]}, indent=2, ensure_ascii=False))
+        return 1 if diferencas else 0
+    for situacao, drop, slot, canal, campo, planilha, xef in diferencas:
+        borne = "" if canal is None else f" Borne {canal + 1:02d}"
+        print(f"{situacao:<10} Drop {drop:02d} Slot {slot:02d}{borne} [{campo}] {planilha!r} -> {xef!r}")
+    print(f"{resumo['iguais']} slot(s) iguais, {resumo['alterados']} alterado(s), {resumo['adicionados']} "
+          f"adicionado(s), {resumo['removidos']} removido(s) em {decorrido:.2f} s")
+    if diferencas:
+        print(f"Relatório: {relatorio}")
+    return 1 if diferencas else 0
+
+#----------------------CACHE DO MODELO----------------------------
+
+def _pasta_cache_padrao():
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "Remote_IO", "cache")
+
+def _hash_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def _chave_cache(caminho_unitpro, memoria_limitada=False):
+    """Chave = hash do conteúdo + mtime + versão da ferramenta + catálogo de cartões (+ modo de leitura)."""
+    mtime = os.stat(caminho_unitpro).st_mtime_ns
+    modo = "|limitada" if memoria_limitada else ""
+    return hashlib.sha256(f"{_hash_arquivo(caminho_unitpro)}|{mtime}|{VERSAO_FERRAMENTA}|{CATALOGO.impressao}{modo}"
+                          .encode()).hexdigest()
+
+def _limitar_cache(pasta_cache, tamanho_max=CACHE_TAMANHO_MAX):
+    """Remove as entradas menos usadas (mtime mais antigo) até o cache caber em tamanho_max bytes."""
+    entradas = []
+    for nome in os.listdir(pasta_cache):
+        if nome.endswith(".pkl"):
+            caminho = os.path.join(pasta_cache, nome)
+            try:
+                st = os.stat(caminho)
+            except OSError:
+                continue
+            entradas.append((st.st_mtime, st.st_size, caminho))
+    total = sum(e[1] for e in entradas)
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= tamanho_max:
+            break
+        try:
+            os.remove(caminho)
+            total -= tamanho
+        except OSError:
+            pass
+
+def carregar_modelo_com_cache(caminho_unitpro, pasta_cache=None, memoria_limitada=False, ao_ler_hardware=None):
+    """
+    Devolve o modelo do .xef (ver montar_modelo) usando o cache em disco quando o
+    arquivo não mudou. Qualquer problema com o cache cai para a leitura normal.
+    ao_ler_hardware só é chamado quando o .xef é relido de fato.
+    """
+    pasta_cache = pasta_cache or _pasta_cache_padrao()
+    try:
+        with PERFIL.etapa("cache_chave"):
+            chave = _chave_cache(caminho_unitpro, memoria_limitada)
+    except OSError:
+        return montar_modelo(caminho_unitpro, memoria_limitada, ao_ler_hardware)  # deixa o erro de leitura aparecer no fluxo normal
+    arquivo_cache = os.path.join(pasta_cache, chave + ".pkl")
+
+    try:
+        with PERFIL.etapa("cache_leitura"), open(arquivo_cache, "rb") as f:
+            modelo = pickle.load(f)
+        os.utime(arquivo_cache)  # marca como usado recentemente (LRU)
+        PERFIL.contar("cache_acertos")
+        log.info("Cache: modelo de %s carregado sem reler o XML.", os.path.basename(caminho_unitpro))
+        return modelo
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log.warning("Aviso: cache inválido ignorado (%s).", e)
+
+    modelo = montar_modelo(caminho_unitpro, memoria_limitada, ao_ler_hardware)
+
+    try:
+        os.makedirs(pasta_cache, exist_ok=True)
+        temporario = f"{arquivo_cache}.{os.getpid()}.tmp"
+        with open(temporario, "wb") as f:
+            pickle.dump(modelo, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, arquivo_cache)
+        _limitar_cache(pasta_cache)
+    except OSError as e:
+        log.warning("Aviso: não foi possível gravar o cache (%s).", e)
+    return modelo
+
+#----------------------ÍNDICE DE TAGS (SQLITE)----------------------------
+# sqlite3 é importado dentro das funções, como o openpyxl, para não pesar na abertura
+
+ESQUEMA_INDICE = """
+CREATE TABLE IF NOT EXISTS projetos (
+    projeto TEXT PRIMARY KEY COLLATE NOCASE,
+    arquivo TEXT,
+    modelo_plc TEXT,
+    indexado_em TEXT
+);
+CREATE TABLE IF NOT EXISTS variaveis (
+    projeto TEXT COLLATE NOCASE,
+    nome TEXT COLLATE NOCASE,
+    tipo TEXT,
+    endereco TEXT,
+    prefixo TEXT,
+    numero INTEGER,
+    comentario TEXT
+);
+CREATE TABLE IF NOT EXISTS canais (
+    projeto TEXT COLLATE NOCASE,
+    num_drop INTEGER,
+    num_slot INTEGER,
+    cartao TEXT,
+    borne INTEGER,
+    tag TEXT COLLATE NOCASE,
+    comentario TEXT,
+    endereco TEXT,
+    prefixo TEXT,
+    numero INTEGER,
+    origem TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_variaveis_nome ON variaveis (nome);
+CREATE INDEX IF NOT EXISTS ix_variaveis_projeto ON variaveis (projeto);
+CREATE INDEX IF NOT EXISTS ix_variaveis_endereco ON variaveis (prefixo, numero);
+CREATE INDEX IF NOT EXISTS ix_canais_tag ON canais (tag);
+CREATE INDEX IF NOT EXISTS ix_canais_endereco ON canais (prefixo, numero);
+CREATE INDEX IF NOT EXISTS ix_canais_posicao ON canais (projeto, num_drop, num_slot);
+"""
+
+def _abrir_indice(arquivo_indice):
+    import sqlite3
+    # timeout: no modo lote vários processos gravam no mesmo arquivo
+    conexao = sqlite3.connect(arquivo_indice, timeout=30)
+    conexao.row_factory = sqlite3.Row
+    conexao.executescript(ESQUEMA_INDICE)
+    return conexao
+
+def _chave_projeto(conexao, titulo, arquivo):
+    """
+    Chave do projeto no índice e as chaves antigas a apagar. O título vem do
+    XEF e se repete entre arquivos ('Project' sem _DCOM, 'Projeto_Sem_Header'):
+    se já pertence a outro .xef, este entra como 'título (arquivo.xef)', sem
+    sobrescrever o outro. Reindexar o mesmo arquivo reaproveita a chave dele.
+    """
+    anteriores = [linha["projeto"] for linha in
+                  conexao.execute("SELECT projeto FROM projetos WHERE arquivo = ?", (arquivo,))]
+    donos = []
+    for candidata in (titulo, f"{titulo} ({os.path.basename(arquivo)})", f"{titulo} ({arquivo})"):
+        dono = conexao.execute("SELECT arquivo FROM projetos WHERE projeto = ?", (candidata,)).fetchone()
+        if dono is None or dono["arquivo"] == arquivo:
+            break
+        donos.append(dono["arquivo"])
+    if donos:
+        log.warning("Aviso: o título '%s' já está no índice para %s; este arquivo será indexado como '%s'.",
+                    titulo, donos[0], candidata)
+    return candidata, set(anteriores) | {candidata}
+
+def gravar_indice_tags(modelo, caminho_unitpro, arquivo_indice):
+    """
+    Grava (ou substitui) o projeto no índice SQLite: todas as variáveis lidas
+    e todos os canais da matriz, com o endereço já normalizado em prefixo/número.
+    """
+    titulo = modelo['titulo']
+    arquivo = os.path.abspath(caminho_unitpro)
+    mapa_por_nome = modelo['mapa_por_nome']
+
+    linhas_variaveis = []
+    for nome, dados in mapa_por_nome.items():
+        norm = normalizar_endereco(dados['endereco']) or (None, None)
+        linhas_variaveis.append((nome, dados['tipo'], dados['endereco'], norm[0], norm[1],
+                                 dados['comentario']))
+
+    linhas_canais = []
+    for drop in modelo['matriz'].values():
+        for num_slot, slot in drop.slots.items():
+            origem = "state_ram" if slot._base_numerica is not None else "ddt"
+            for i in range(slot.qtd_canais):
+                tag = slot._nomes[i]
+                endereco = slot.endereco_canal(i)
+                if not endereco and tag in mapa_por_nome:
+                    # Alias de DDT: o endereço, se houver, é o da própria variável
+                    endereco = mapa_por_nome[tag]['endereco'] or ""
+                norm = normalizar_endereco(endereco) or (None, None)
+                linhas_canais.append((drop.numero, num_slot, slot.modelo, i + 1,
+                                      None if tag == PLACEHOLDER else tag,
+                                      None if slot._comentarios[i] == PLACEHOLDER else slot._comentarios[i],
+                                      endereco or None, norm[0], norm[1], origem))
+
+    conexao = _abrir_indice(arquivo_indice)
+    try:
+        with conexao:  # uma transação: quem consulta nunca vê o projeto pela metade
+            # IMMEDIATE: no modo lote, dois processos não escolhem a mesma chave
+            conexao.execute("BEGIN IMMEDIATE")
+            projeto, anteriores = _chave_projeto(conexao, titulo, arquivo)
+            for tabela in ("projetos", "variaveis", "canais"):
+                conexao.executemany(f"DELETE FROM {tabela} WHERE projeto = ?", [(p,) for p in anteriores])
+            conexao.execute("INSERT INTO projetos VALUES (?, ?, ?, ?)",
+                            (projeto, arquivo, modelo['modelo_plc'], datetime.now().isoformat(timespec="seconds")))
+            conexao.executemany("INSERT INTO variaveis VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                ((projeto,) + linha for linha in linhas_variaveis))
+            conexao.executemany("INSERT INTO canais VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                ((projeto,) + linha for linha in linhas_canais))
+    finally:
+        conexao.close()
+    PERFIL.contar("linhas_indexadas", len(linhas_variaveis) + len(linhas_canais))
+    log.info("Índice de tags atualizado: %s, projeto '%s' (%s variáveis, %s canais)", arquivo_indice,
+             projeto, len(linhas_variaveis), len(linhas_canais))
+
+def consultar_indice(arquivo_indice, tag=None, endereco=None, ddt_sem_comentario=False, projeto=None):
+    """
+    Consulta o índice sem reler o .xef. Um dos critérios:
+      tag                -> onde a tag está (drop/slot/borne) e a declaração da variável
+      endereco           -> canais e variáveis no mesmo endereço ('%I33' == '%I00033')
+      ddt_sem_comentario -> aliases de cartões DDT cujo canal ficou sem comentário
+    Devolve uma lista de dicts.
+    """
+    if not os.path.isfile(arquivo_indice):
+        raise FileNotFoundError(f"Índice não encontrado: {arquivo_indice}")
+    filtro_projeto, params_projeto = (" AND projeto = ?", [projeto]) if projeto else ("", [])
+
+    if tag is not None:
+        consultas = [
+            ("canal", "SELECT * FROM canais WHERE tag = ?", [tag]),
+            ("variavel", "SELECT * FROM variaveis WHERE nome = ?", [tag]),
+        ]
+    elif endereco is not None:
+        norm = normalizar_endereco(endereco)
+        if norm is None:
+            raise ValueError(f"Endereço inválido: {endereco} (esperado algo como %I33)")
+        consultas = [
+            ("canal", "SELECT * FROM canais WHERE prefixo = ? AND numero = ?", list(norm)),
+            ("variavel", "SELECT * FROM variaveis WHERE prefixo = ? AND numero = ?", list(norm)),
+        ]
+    elif ddt_sem_comentario:
+        consultas = [
+            ("canal", "SELECT * FROM canais WHERE origem = 'ddt' AND tag IS NOT NULL"
+                      " AND (comentario IS NULL OR comentario = '')", []),
+        ]
+    else:
+        raise ValueError("Informe tag, endereco ou ddt_sem_comentario.")
+
+    conexao = _abrir_indice(arquivo_indice)
+    try:
+        resultado = []
+        for fonte, sql, params in consultas:
+            for linha in conexao.execute(sql + filtro_projeto, params + params_projeto):
+                resultado.append({'fonte': fonte, **dict(linha)})
+        return resultado
+    finally:
+        conexao.close()
+
+def _consultar_cli(argv):
+    """Subcomando: Remote_IO_automatico consultar INDICE.db (--tag X | --endereco %I33 | --ddt-sem-comentario)"""
+    parser = argparse.ArgumentParser(prog="Remote_IO_automatico consultar",
+                                     description="Consulta o índice de tags gerado com --index.")
+    parser.add_argument("indice", help="Arquivo SQLite gerado com --index")
+    criterio = parser.add_mutually_exclusive_group(required=True)
+    criterio.add_argument("--tag", help="Onde está a tag (drop/slot/borne) e como ela foi declarada")
+    criterio.add_argument("--endereco", help="Tags que compartilham o endereço (ex.: %%I33)")
+    criterio.add_argument("--ddt-sem-comentario", action="store_true",
+                          help="Aliases de cartões DDT sem comentário")
+    parser.add_argument("--projeto", default=None, help="Restringe a um projeto (título do .xef)")
+    parser.add_argument("--json", dest="saida_json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        linhas = consultar_indice(args.indice, args.tag, args.endereco, args.ddt_sem_comentario, args.projeto)
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+    decorrido = time.perf_counter() - inicio
+
+    if args.saida_json:
+        print(json.dumps(linhas, indent=2, ensure_ascii=False))
+        return 0
+    for l in linhas:
+        if l['fonte'] == "canal":
+            print(f"{l['projeto']}  Drop {l['num_drop']:02d} Slot {l['num_slot']:02d} Borne {l['borne']:02d}  "
+                  f"{l['cartao']}  {l['tag'] or PLACEHOLDER}  {l['endereco'] or ''}  {l['comentario'] or ''}")
+        else:
+            print(f"{l['projeto']}  variável {l['nome']} ({l['tipo']})  {l['endereco'] or ''}  {l['comentario'] or ''}")
+    print(f"{len(linhas)} resultado(s) em {decorrido * 1000:.1f} ms")
+    return 0 if linhas else 1
+
+#----------------------PIPELINE / PROCESSAMENTO EM LOTE----------------------------
+
+def montar_modelo(caminho_unitpro, memoria_limitada=False, ao_ler_hardware=None, filtro=None):
+    """
+    Lê o .xef e devolve o modelo já preenchido: matriz, variáveis, título e família do PLC.
+    memoria_limitada=True usa extrair_xef_limitado (para exportações muito grandes).
+    ao_ler_hardware(matriz) recebe a matriz (ainda sem nomes/comentários) assim
+    que o IOConf termina, antes da leitura das variáveis.
+    filtro (FiltroHardware): a matriz só recebe os slots escolhidos e só os DDT
+    desses slots têm os Alias extraídos; o catálogo de variáveis continua completo.
+    """
+    matriz_hardware = None
+
+    def hardware_lido(dados_xef):
+        nonlocal matriz_hardware
+        with PERFIL.etapa("gerar_matriz_plc"):
+            matriz_hardware = gerar_matriz_plc(dados_xef, filtro)
+        if filtro is not None:
+            dados_xef.ddt_desejados = {str(s.endereco_base) for d in matriz_hardware.values()
+                                       for s in d.slots.values() if s._base_numerica is None}
+        if ao_ler_hardware:
+            ao_ler_hardware(matriz_hardware)
+
+    # 0. Leitura única do XEF (header, PLC, módulos e variáveis)
+    leitor = extrair_xef_limitado if memoria_limitada else extrair_xef
+    with PERFIL.etapa("extrair_xef"):
+        dados_xef = leitor(caminho_unitpro, hardware_lido if ao_ler_hardware or filtro else None)
 
     # 1. Leitura e Catalogação das Variáveis
-    lista_variaveis_lidas = ler_variaveis_unitpro(caminho_unitpro)
+    with PERFIL.etapa("ler_variaveis_unitpro"):
+        lista_variaveis_lidas = ler_variaveis_unitpro(dados_xef)
+
+    # 2. Gerar a estrutura a partir do hardware do PLC (se o gancho ainda não gerou)
+    if matriz_hardware is None:
+        with PERFIL.etapa("gerar_matriz_plc"):
+            matriz_hardware = gerar_matriz_plc(dados_xef, filtro)
 
-    # 2. Gerar a estrutura a partir do hardware do PLC
-    matriz_hardware = gerar_matriz_plc(caminho_unitpro)
- 
     # 3. Preencher os nomes dos canais com base nas variáveis do arquivo
-    preencher_canais_da_matriz(caminho_unitpro, matriz_hardware,lista_variaveis_lidas)
+    with PERFIL.etapa("preencher_canais_da_matriz"):
+        preencher_canais_da_matriz(dados_xef, matriz_hardware,lista_variaveis_lidas)
 
     # 4. Preencher os COMENTÁRIOS nos canais
     # Cruza os dados da matriz com a lista_variaveis_lidas
-    preencher_comentarios_na_matriz(matriz_hardware, lista_variaveis_lidas)
+    with PERFIL.etapa("preencher_comentarios_na_matriz"):
+        preencher_comentarios_na_matriz(matriz_hardware, lista_variaveis_lidas)
+
+    # 5. Título do projeto e família do PLC
+    with PERFIL.etapa("ler_titulo_modelo"):
+        titulo_projeto, modelo_plc = ler_titulo_modelo(dados_xef,lista_variaveis_lidas)
+
+    return {
+        'matriz': matriz_hardware,
+        'mapa_por_nome': lista_variaveis_lidas,
+        'titulo': titulo_projeto,
+        'modelo_plc': modelo_plc,
+    }
 
-    # Supondo que você extraiu essas informações do XML ou entrada do usuário:
-    titulo_projeto, modelo_plc = ler_titulo_modelo(caminho_unitpro,lista_variaveis_lidas) 
-    
+def processar_arquivo(caminho_unitpro, pasta_saida=None, usar_cache=True, pasta_cache=None, motor_excel="normal",
+                      planilha_anterior=None, perfilar=False, arquivo_cprofile=None, modelo=None,
+                      formatos=("xlsx",), arquivo_indice=None, memoria_limitada=False, workers_excel=None,
+                      por_drop=False, arquivo_catalogo=None, pipeline=False, filtro=None, canais_reais=False):
+    """
+    Executa leitura -> matriz -> preenchimento -> Excel para um .xef e devolve um resumo.
+    Com perfilar=True o resumo traz o relatório de etapas/contadores em 'perfil';
+    com arquivo_cprofile a execução inteira é gravada em formato pstats.
+    Um 'modelo' já montado (ver montar_modelo) pula a leitura do .xef.
+    'formatos' escolhe as saídas (FORMATOS_SAIDA); elas são gravadas em paralelo.
+    Com arquivo_indice o projeto também é gravado no índice de tags SQLite.
+    memoria_limitada=True lê o .xef com extrair_xef_limitado.
+    workers_excel/por_drop vão para gerar_excel (motor 'parallel' / um workbook por drop).
+    arquivo_catalogo: catalogo_cartoes.json a usar (também nos processos do lote).
+    pipeline=True sobrepõe a montagem da planilha à leitura (ver EscritorPipeline).
+    filtro (FiltroHardware) gera só os drops/slots/cartões escolhidos; canais_reais=True
+    imprime só os bornes que cada cartão tem.
+    """
+    if arquivo_cprofile:
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(processar_arquivo, caminho_unitpro, pasta_saida, usar_cache, pasta_cache,
+                                    motor_excel, planilha_anterior, perfilar, None, modelo, formatos,
+                                    arquivo_indice, memoria_limitada, workers_excel, por_drop, arquivo_catalogo,
+                                    pipeline, filtro, canais_reais)
+        finally:
+            profiler.dump_stats(arquivo_cprofile)
+            log.info("cProfile gravado em %s", arquivo_cprofile)
+
+    inicio = time.perf_counter()
+    if perfilar:
+        PERFIL.ativar()
+    if arquivo_catalogo:
+        usar_catalogo(arquivo_catalogo)
+
+    PERFIL.reiniciar()
+    # O pipeline só vale para o workbook único (por_drop grava vários arquivos)
+    escritor = None
+    if pipeline and "xlsx" in formatos and not por_drop:
+        escritor = EscritorPipeline(usar_processo=workers_excel != 1, canais_reais=canais_reais)
+    ao_ler_hardware = escritor.iniciar if escritor else None
+    if escritor and filtro is not None:
+        ao_ler_hardware = lambda matriz: escritor.iniciar(filtro.filtrar_matriz(matriz))
+    # O cache guarda o projeto inteiro e o índice também é do projeto inteiro: nesses
+    # casos o filtro é aplicado depois, sobre o modelo completo
+    if modelo is not None:
+        pass
+    elif usar_cache:
+        modelo = carregar_modelo_com_cache(caminho_unitpro, pasta_cache, memoria_limitada, ao_ler_hardware)
+    else:
+        modelo = montar_modelo(caminho_unitpro, memoria_limitada, ao_ler_hardware,
+                               None if arquivo_indice else filtro)
+
+    if arquivo_indice:
+        with PERFIL.etapa("gravar_indice_tags"):
+            gravar_indice_tags(modelo, caminho_unitpro, arquivo_indice)
+
+    if filtro is not None:
+        modelo = filtro.aplicar(modelo)
+        # Um --drop/--card digitado errado não pode virar uma planilha vazia com sucesso
+        if not _tem_slot_impresso(modelo['matriz']):
+            if escritor:
+                escritor.encerrar()
+            raise ValueError(f"{os.path.basename(caminho_unitpro)}: nenhum slot corresponde ao filtro "
+                             f"(--drop/--slot/--card); nada foi gerado.")
+    matriz_hardware = modelo['matriz']
+    titulo_projeto = modelo['titulo']
+    if escritor and not escritor.iniciado:
+        escritor.iniciar(matriz_hardware)  # modelo do cache: o esqueleto ainda adianta a comparação
+
+    # 6. (Opcional) Diferença contra a planilha anterior: só os blocos alterados ganham nova revisão
+    revisoes = None
+    alteracoes = None
+    if planilha_anterior:
+        data_hoje = datetime.now().strftime("%Y-%m-%d")
+        with PERFIL.etapa("comparar_com_planilha"):
+            blocos_anteriores = ler_planilha_remote_io(planilha_anterior)
+            if filtro is not None:  # slots fora do filtro não foram "removidos"
+                blocos_anteriores = {k: b for k, b in blocos_anteriores.items() if filtro.aceita(k[0], k[1], b['cartao'])}
+            revisoes, alteracoes = comparar_com_planilha(matriz_hardware, titulo_projeto, modelo['modelo_plc'],
+                                                         blocos_anteriores, data_hoje, canais_reais)
+        blocos_alterados = sorted({(a[0], a[1]) for a in alteracoes})
+        log.info("Incremental: %s bloco(s) alterado(s), %s célula(s).", len(blocos_alterados), len(alteracoes))
+        for drop, slot, canal, campo, antigo, novo, celula in alteracoes:
+            canal_txt = "" if canal is None else f" Borne {canal + 1:02d}"
+            log.info("  Drop %02d Slot %02d%s [%s] %r -> %r (%s)", drop, slot, canal_txt, campo, antigo, novo, celula or '-')
+
+    # 7. Geração dos arquivos com o nome dinâmico: REMOTE_IO_[UC1000CC21]_2025-12-31.xlsx (.csv, ...)
+    # Cada formato só lê a matriz, então a planilha e as exportações rodam em paralelo
+    def gerar(formato):
+        with PERFIL.etapa("gerar_excel" if formato == "xlsx" else f"exportar_{formato}"):
+            if formato == "xlsx" and escritor:
+                return escritor.concluir(matriz_hardware, titulo_projeto, modelo['modelo_plc'], pasta_saida, revisoes)
+            if formato == "xlsx":
+                return gerar_excel(matriz_hardware, titulo_projeto, modelo['modelo_plc'], pasta_saida, motor_excel,
+                                   revisoes, workers_excel, por_drop, canais_reais)
+            return EXPORTADORES[formato](matriz_hardware, titulo_projeto, pasta_saida)
+
+    formatos = list(dict.fromkeys(formatos))
+    if len(formatos) == 1:
+        gerados = [gerar(formatos[0])]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(formatos)) as executor:
+            gerados = list(executor.map(gerar, formatos))
+    # Com por_drop a planilha vira uma lista de arquivos
+    saidas = [arq for g in gerados for arq in (g if isinstance(g, list) else [g])]
+    nome_arquivo = saidas[0] if saidas else None
+
+    if alteracoes is not None:
+        relatorio = nome_arquivo_saida(titulo_projeto, "_alteracoes.csv", pasta_saida)
+        gravar_relatorio_alteracoes(alteracoes, relatorio)
+        log.info("Relatório de alterações: %s", relatorio)
+
+    slots_impressos = [s for d in matriz_hardware.values() for n, s in d.slots.items() if n >= 3]
+    return {
+        'arquivo': caminho_unitpro,
+        'saida': nome_arquivo,
+        'saidas': saidas,
+        'titulo': titulo_projeto,
+        'drops': len(matriz_hardware),
+        'slots': len(slots_impressos),
+        'tags': sum(1 for s in slots_impressos for c in s.canais if c.nome and c.nome != "-"),
+        'linhas': sum(3 + (s.qtd_canais if canais_reais else CANAIS_POR_BLOCO) for s in slots_impressos),
+        'tempo': time.perf_counter() - inicio,
+        'erro': None,
+        'perfil': PERFIL.relatorio() if perfilar else None,
+    }
+
+def _processar_arquivo_isolado(caminho_unitpro, **opcoes):
+    """Versão usada pelos workers: uma falha vira uma linha de erro no resumo, não derruba o lote."""
+    inicio = time.perf_counter()
+    try:
+        return processar_arquivo(caminho_unitpro, **opcoes)
+    except Exception as e:
+        return {'arquivo': caminho_unitpro, 'saida': None, 'saidas': [], 'titulo': None, 'drops': 0, 'slots': 0,
+                'tags': 0, 'linhas': 0, 'tempo': time.perf_counter() - inicio,
+                'erro': f"{type(e).__name__}: {e}", 'perfil': None}
+
+def listar_arquivos_xef(entradas):
+    """Expande diretórios (todos os *.xef) e padrões glob em uma lista ordenada de arquivos."""
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            encontrados = glob.glob(os.path.join(entrada, "*.xef"))
+        elif glob.has_magic(entrada):
+            encontrados = glob.glob(entrada)
+        else:
+            encontrados = [entrada]
+        for caminho in sorted(encontrados):
+            if caminho not in arquivos:
+                arquivos.append(caminho)
+    return arquivos
+
+def processar_lote(caminhos, workers=None, **opcoes):
+    """
+    Processa vários .xef em paralelo (um processo por arquivo) e devolve os resumos
+    na ordem de entrada. 'opcoes' são repassadas para processar_arquivo.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    resultados = {}
+    arquivo_cprofile = opcoes.pop('arquivo_cprofile', None)
+    opcoes['workers_excel'] = 1  # no lote o paralelismo já é um processo por arquivo
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = {}
+        for c in caminhos:
+            if arquivo_cprofile:
+                # Um .prof por arquivo: base_<nome do xef>.prof
+                raiz, ext = os.path.splitext(arquivo_cprofile)
+                nome_xef = os.path.splitext(os.path.basename(c))[0]
+                opcoes['arquivo_cprofile'] = f"{raiz}_{nome_xef}{ext or '.prof'}"
+            futuros[executor.submit(_processar_arquivo_isolado, c, **opcoes)] = c
+        for futuro in as_completed(futuros):
+            caminho = futuros[futuro]
+            try:
+                resultados[caminho] = futuro.result()
+            except Exception as e:
+                # Ex.: worker morto pelo sistema operacional
+                resultados[caminho] = {'arquivo': caminho, 'saida': None, 'saidas': [], 'titulo': None, 'drops': 0,
+                                       'slots': 0, 'tags': 0, 'linhas': 0, 'tempo': 0.0,
+                                       'erro': f"{type(e).__name__}: {e}", 'perfil': None}
+    return [resultados[c] for c in caminhos]
+
+def imprimir_resumo(resultados):
+    print("\n" + "=" * 100)
+    print(f"{'ARQUIVO':<40} {'DROPS':>5} {'SLOTS':>5} {'TAGS':>6} {'LINHAS':>7} {'TEMPO(s)':>9}  STATUS")
+    print("-" * 100)
+    for r in resultados:
+        status = "OK -> " + os.path.basename(r['saida'] or '-') if r['erro'] is None else "ERRO: " + r['erro']
+        print(f"{os.path.basename(r['arquivo'])[:40]:<40} {r['drops']:>5} {r['slots']:>5} {r['tags']:>6} "
+              f"{r['linhas']:>7} {r['tempo']:>9.2f}  {status}")
+    print("-" * 100)
+    falhas = sum(1 for r in resultados if r['erro'] is not None)
+    print(f"{len(resultados)} arquivo(s), {len(resultados) - falhas} OK, {falhas} com erro.")
+
+    # Projetos com o mesmo título geram o mesmo nome de .xlsx: o último sobrescreve os outros
+    saidas = [r['saida'] for r in resultados if r['saida']]
+    for saida in sorted(set(s for s in saidas if saidas.count(s) > 1)):
+        print(f"Aviso: {os.path.basename(saida)} foi gerado por mais de um arquivo e foi sobrescrito.")
+
+#----------------------MODO WATCH----------------------------
+
+def monitorar(entradas, usar_cache=True, pasta_cache=None, intervalo=0.25, estabilidade=0.5, **opcoes):
+    """
+    Mantém o processo aberto e regenera a planilha sempre que um .xef das
+    'entradas' (arquivos, diretórios ou globs) aparece ou muda. Um arquivo só é
+    processado depois de ficar 'estabilidade' segundos sem mudar de tamanho/mtime,
+    para não ler uma exportação do Unity Pro pela metade. O modelo de cada arquivo
+    fica em memória: se o conteúdo não mudou (só o mtime) ele é reaproveitado.
+    """
+    assinaturas = {}  # caminho -> (mtime_ns, tamanho) da última varredura
+    mudou_em = {}     # caminho -> instante da última mudança ainda não processada
+    processados = {}  # caminho -> (hash do conteúdo, modelo, arquivo gerado)
+
+    log.info("Monitorando %s (Ctrl+C para sair)...", ", ".join(entradas))
+    try:
+        while True:
+            agora = time.monotonic()
+            atuais = {}
+            for caminho in listar_arquivos_xef(entradas):
+                try:
+                    st = os.stat(caminho)
+                except OSError:
+                    continue
+                atuais[caminho] = (st.st_mtime_ns, st.st_size)
+                if assinaturas.get(caminho) != atuais[caminho]:
+                    mudou_em[caminho] = agora
+
+            for caminho in list(mudou_em):
+                if caminho not in atuais:
+                    del mudou_em[caminho]  # apagado/renomeado antes de estabilizar
+                elif agora - mudou_em[caminho] >= estabilidade:
+                    del mudou_em[caminho]
+                    _regenerar_monitorado(caminho, processados, usar_cache, pasta_cache, opcoes)
+            assinaturas = atuais
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        log.info("Monitoramento encerrado.")
+
+def _regenerar_monitorado(caminho, processados, usar_cache, pasta_cache, opcoes):
+    try:
+        if opcoes.get('arquivo_catalogo'):
+            usar_catalogo(opcoes['arquivo_catalogo'])
+        conteudo = _hash_arquivo(caminho)
+        anterior = processados.get(caminho)
+        if anterior and anterior[0] == conteudo and anterior[2] and os.path.exists(anterior[2]):
+            log.info("%s: conteúdo igual ao último processado, nada a fazer.", os.path.basename(caminho))
+            return
+        if anterior and anterior[0] == conteudo:
+            modelo = anterior[1]
+        elif usar_cache:
+            modelo = carregar_modelo_com_cache(caminho, pasta_cache, opcoes.get('memoria_limitada', False))
+        else:
+            modelo = montar_modelo(caminho, opcoes.get('memoria_limitada', False))
+        resumo = processar_arquivo(caminho, usar_cache=usar_cache, pasta_cache=pasta_cache, modelo=modelo, **opcoes)
+        processados[caminho] = (conteudo, modelo, resumo['saida'])
+        log.info("%s: %s slots regenerados em %.2f s.", os.path.basename(caminho), resumo['slots'], resumo['tempo'])
+    except Exception as e:
+        log.error("%s: erro ao regenerar (%s: %s)", os.path.basename(caminho), type(e).__name__, e)
+
+#----------------------API (USO COMO BIBLIOTECA)----------------------------
+# import Remote_IO_automatico as rio
+# modelo = rio.modelo_do_xef(conteudo_do_xef)     # caminho, bytes ou arquivo aberto
+# xlsx = rio.planilha_em_bytes(modelo)             # .xlsx pronto em memória, nada vai para o disco
+# dados = rio.modelo_para_dict(modelo, drops=[2])  # JSON-serializável, por drop/slot
+
+def modelo_do_xef(origem, memoria_limitada=False):
+    """
+    Modelo (ver montar_modelo) de um .xef dado como caminho, bytes ou arquivo
+    aberto em modo binário. Não grava nada em disco (nem o cache do modelo).
+    """
+    if isinstance(origem, (bytes, bytearray, memoryview)):
+        import io
+        origem = io.BytesIO(origem)
+    return montar_modelo(origem, memoria_limitada)
+
+def filtrar_modelo(modelo, drops=None, slots=None, cartoes=None):
+    """
+    Cópia rasa do modelo só com os drops/slots/cartões pedidos (None = todos; ver
+    FiltroHardware). Os Slot são os mesmos objetos: filtrar não copia canais.
+    """
+    if drops is None and slots is None and not cartoes:
+        return modelo
+    return FiltroHardware(drops, slots, cartoes).aplicar(modelo)
+
+def planilha_em_bytes(modelo, revisoes=None, canais_reais=False):
+    """O .xlsx da lista de IO (mesmo layout de gerar_excel) como bytes, sem tocar o disco."""
+    import io
+
+    data_hoje = datetime.now().strftime("%Y-%m-%d")
+    tarefas = _tarefas_por_drop(modelo['matriz'], revisoes, data_hoje, canais_reais=canais_reais)
+    esqueleto, estilos = _esqueleto_xlsx(_blocos_das_tarefas(tarefas))
+    destino = io.BytesIO()
+    _montar_xlsx_com_linhas(esqueleto, (_xml_linhas_drop(num_drop, slots, modelo['titulo'], modelo['modelo_plc'],
+                                                         inicio, estilos)
+                                        for num_drop, slots, inicio in tarefas), destino)
+    return destino.getvalue()
+
+def modelo_para_dict(modelo, drops=None, slots=None, cartoes=None):
+    """Título, família do PLC e drops -> slots -> canais reais, em estruturas simples (JSON)."""
+    modelo = filtrar_modelo(modelo, drops, slots, cartoes)
+    saida = {'titulo': modelo['titulo'], 'modelo_plc': modelo['modelo_plc'], 'drops': []}
+    for num_drop in sorted(modelo['matriz'].keys()):
+        obj_drop = modelo['matriz'][num_drop]
+        lista_slots = []
+        for num_slot in sorted(obj_drop.slots.keys()):
+            obj_slot = obj_drop.slots[num_slot]
+            lista_slots.append({
+                'slot': num_slot,
+                'cartao': obj_slot.modelo,
+                'endereco_base': obj_slot.endereco_base,
+                'canais': [{'borne': i + 1, 'bit': i,
+                            'tag': None if obj_slot._nomes[i] == PLACEHOLDER else obj_slot._nomes[i],
+                            'comentario': None if obj_slot._comentarios[i] == PLACEHOLDER else obj_slot._comentarios[i],
+                            'endereco': obj_slot.endereco_canal(i) or None}
+                           for i in range(obj_slot.qtd_canais)],
+            })
+        saida['drops'].append({'drop': num_drop, 'slots': lista_slots})
+    return saida
+
+#----------------------SERVIÇO HTTP----------------------------
+
+class CacheProjetos:
+    """
+    LRU com trava para o serviço: guarda até 'capacidade' valores (modelos ou
+    planilhas prontas). Pedidos simultâneos da mesma chave montam uma vez só;
+    os outros esperam o mesmo resultado.
+    """
+    def __init__(self, capacidade=16):
+        import threading
+        from collections import OrderedDict
+        self.capacidade = capacidade
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        self._montando = {}  # chave -> Future de quem está montando
+
+    def __len__(self):
+        return len(self._itens)
+
+    def obter(self, chave, montar):
+        from concurrent.futures import Future
+
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                PERFIL.contar("servico_cache_acertos")
+                return self._itens[chave]
+            futuro = self._montando.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._montando[chave] = Future()
+        if not dono:
+            return futuro.result()
+
+        try:
+            valor = montar()
+        except BaseException as e:
+            with self._trava:
+                del self._montando[chave]
+            futuro.set_exception(e)
+            raise
+        with self._trava:
+            del self._montando[chave]
+            self._itens[chave] = valor
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+        futuro.set_result(valor)
+        return valor
+
+def _faixas_de_inteiros(texto):
+    """'2,5' -> ((2, 2), (5, 5)); '4-10' -> ((4, 10),); vazio/None -> None (sem filtro). Ver _faixas."""
+    if not texto:
+        return None
+    faixas = []
+    for parte in texto.split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        try:
+            if "-" in parte:
+                inicio, fim = parte.split("-", 1)
+                faixas.append((int(inicio), int(fim)))
+            else:
+                faixas.append((int(parte), int(parte)))
+        except ValueError:
+            raise ValueError(f"lista de números inválida: {texto!r} (use 2,5 ou 4-10)") from None
+    return _faixas(faixas)
+
+def servir(raiz, host="127.0.0.1", porta=8765, capacidade=16, memoria_limitada=False):
+    """
+    Serviço HTTP local (ThreadingHTTPServer) para gerar listas de IO sob demanda:
+      GET  /saude                               estado e projetos em cache
+      GET  /projetos                            .xef disponíveis em 'raiz'
+      GET  /planilha?xef=ARQ[&drop=2,5][&slot=4-10][&card=140DDI*][&reais=1]   .xlsx (bytes)
+      GET  /modelo?xef=ARQ[&drop=..][&slot=..][&card=..]                       JSON por drop/slot
+      POST /planilha e /modelo                  corpo = conteúdo do .xef
+    Os modelos ficam em um LRU (chave = caminho + mtime + tamanho, ou o sha256
+    do corpo) e as planilhas prontas em outro; um pedido repetido não relê nada.
+    """
+    from http.server import ThreadingHTTPServer
+
+    raiz = os.path.realpath(raiz)
+    modelos = CacheProjetos(capacidade)
+    planilhas = CacheProjetos(capacidade)
+    servidor = ThreadingHTTPServer((host, porta), _criar_handler_servico(raiz, modelos, planilhas, memoria_limitada))
+    servidor.daemon_threads = True
+    print(f"Servindo {raiz} em http://{servidor.server_address[0]}:{servidor.server_address[1]}/ (Ctrl+C para sair)",
+          flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("Serviço encerrado.")
+    finally:
+        servidor.server_close()
+
+def _criar_handler_servico(raiz, modelos, planilhas, memoria_limitada):
+    """Classe do handler (http.server só é importado quando o serviço sobe)."""
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlsplit, parse_qs
+    from xml.parsers.expat import ExpatError  # leitor de memória limitada
+
+    class HandlerRemoteIO(BaseHTTPRequestHandler):
+        server_version = f"RemoteIO/{VERSAO_FERRAMENTA}"
+
+        def log_message(self, formato, *args):
+            log.info("%s %s", self.address_string(), formato % args)
+
+        def _responder(self, status, corpo, tipo, extras=()):
+            self.send_response(status)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(corpo)))
+            for nome, valor in extras:
+                self.send_header(nome, valor)
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def _json(self, status, dados):
+            self._responder(status, json.dumps(dados, ensure_ascii=False).encode("utf-8"),
+                            "application/json; charset=utf-8")
+
+        def _modelo(self, parametros):
+            """(chave, modelo) do .xef do pedido: corpo do POST ou ?xef= relativo à raiz."""
+            if self.command == "POST":
+                corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not corpo:
+                    raise ValueError("corpo vazio: envie o conteúdo do .xef")
+                chave = ("conteudo", hashlib.sha256(corpo).hexdigest())
+                return chave, modelos.obter(chave, lambda: modelo_do_xef(corpo, memoria_limitada))
+            relativo = (parametros.get("xef") or [""])[0]
+            if not relativo:
+                raise ValueError("informe ?xef=arquivo.xef (relativo à raiz do serviço)")
+            caminho = os.path.realpath(os.path.join(raiz, relativo))
+            if os.path.commonpath([raiz, caminho]) != raiz:
+                raise PermissionError(relativo)
+            if not os.path.isfile(caminho):  # ex.: ?xef=. aponta para um diretório
+                raise FileNotFoundError(relativo)
+            info = os.stat(caminho)
+            chave = ("arquivo", caminho, info.st_mtime_ns, info.st_size)
+            return chave, modelos.obter(chave, lambda: montar_modelo(caminho, memoria_limitada))
+
+        def _atender(self):
+            url = urlsplit(self.path)
+            parametros = parse_qs(url.query)
+            try:
+                if url.path == "/saude" and self.command == "GET":
+                    return self._json(200, {'versao': VERSAO_FERRAMENTA, 'projetos_em_cache': len(modelos),
+                                            'planilhas_em_cache': len(planilhas)})
+                if url.path == "/projetos" and self.command == "GET":
+                    arquivos = listar_arquivos_xef([raiz]) if os.path.isdir(raiz) else []
+                    return self._json(200, [os.path.relpath(a, raiz) for a in arquivos])
+                if url.path not in ("/planilha", "/modelo"):
+                    return self._json(404, {'erro': f"rota desconhecida: {url.path}"})
+
+                drops = _faixas_de_inteiros((parametros.get("drop") or [""])[0])
+                slots = _faixas_de_inteiros((parametros.get("slot") or [""])[0])
+                cartoes = [c for c in (parametros.get("card") or [""])[0].split(",") if c] or None
+                canais_reais = (parametros.get("reais") or ["0"])[0] not in ("", "0")
+                chave, modelo = self._modelo(parametros)
+                if url.path == "/modelo":
+                    return self._json(200, modelo_para_dict(modelo, drops, slots, cartoes))
+
+                filtrado = filtrar_modelo(modelo, drops, slots, cartoes)
+                if not _tem_slot_impresso(filtrado['matriz']):  # mesma regra do processar_arquivo
+                    return self._json(404, {'erro': "nenhum slot corresponde ao filtro (drop/slot/card)"})
+                data_hoje = datetime.now().strftime("%Y-%m-%d")  # a data de revisão faz parte da planilha
+                filtros = (drops, slots, tuple(cartoes) if cartoes else None, canais_reais)
+                conteudo = planilhas.obter((chave, filtros, data_hoje),
+                                           lambda: planilha_em_bytes(filtrado, canais_reais=canais_reais))
+                nome = os.path.basename(nome_arquivo_saida(modelo['titulo'], ".xlsx"))
+                self._responder(200, conteudo,
+                                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                [("Content-Disposition", f'attachment; filename="{nome}"')])
+            except FileNotFoundError as e:
+                self._json(404, {'erro': f"arquivo não encontrado: {e.filename or e}"})
+            except PermissionError as e:
+                self._json(403, {'erro': f"fora da raiz do serviço: {e}"})
+            except ValueError as e:
+                self._json(400, {'erro': str(e)})
+            except (ET.ParseError, ExpatError) as e:
+                self._json(400, {'erro': f"XML inválido: {e}"})
+            except Exception as e:
+                log.error("Erro no pedido %s: %s: %s", self.path, type(e).__name__, e)
+                self._json(500, {'erro': f"{type(e).__name__}: {e}"})
+
+        do_GET = _atender
+        do_POST = _atender
+
+    return HandlerRemoteIO
+
+def _servir_cli(argv):
+    """Subcomando: Remote_IO_automatico servir [RAIZ] [--host H] [--port P] [--cache N]"""
+    parser = argparse.ArgumentParser(prog="Remote_IO_automatico servir",
+                                     description="Serviço HTTP local que gera planilhas/JSON de REMOTE IO sob demanda.")
+    parser.add_argument("raiz", nargs="?", default=".", help="Diretório com os .xef servidos (padrão: atual)")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument("--port", dest="porta", type=int, default=8765, help="Porta (padrão: 8765)")
+    parser.add_argument("--cache", dest="capacidade", type=int, default=16,
+                        help="Projetos (e planilhas) mantidos em memória no LRU (padrão: 16)")
+    parser.add_argument("--low-memory", dest="memoria_limitada", action="store_true",
+                        help="Lê os .xef com memória limitada")
+    parser.add_argument("--catalog", dest="arquivo_catalogo", default=None, metavar="JSON",
+                        help=f"Catálogo de cartões (padrão: {ARQUIVO_CATALOGO} ao lado do programa, se existir; "
+                             "senão o empacotado com ele)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Registra cada pedido")
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="%(message)s", level=logging.INFO if args.verbose else logging.WARNING)
+
+    arquivo_catalogo = args.arquivo_catalogo or _catalogo_padrao(_diretorio_programa())
+    if arquivo_catalogo:
+        try:
+            usar_catalogo(arquivo_catalogo)
+        except (OSError, ValueError) as e:
+            parser.error(f"catálogo de cartões inválido: {e}")
+    servir(args.raiz, args.host, args.porta, args.capacidade, args.memoria_limitada)
+    return 0
+
+def _diretorio_programa():
+    """Diretório do script .py ou do executável (PyInstaller), onde ficam unitpro.xef e o catálogo."""
+    # Essa lógica funciona tanto para o script .py quanto para o executável .exe (frozen)
+    if getattr(sys, 'frozen', False):
+        # Se estiver rodando como executável (PyInstaller), usa o caminho do binário.
+        return os.path.dirname(sys.executable)
+    # Se estiver rodando como script Python (.py), usa o caminho do arquivo de script.
+    # É fundamental usar o try-except ou um método robusto para evitar erros ao ser chamado de outro diretório.
+    try:
+        return os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        # Fallback caso __file__ não esteja definido (raro, mas seguro)
+        return os.getcwd()
+
+def _catalogo_padrao(diretorio_script):
+    """catalogo_cartoes.json ao lado do programa, se existir (senão fica o empacotado, ver CatalogoCartoes.embutido)."""
+    caminho = os.path.join(diretorio_script, ARQUIVO_CATALOGO)
+    return caminho if os.path.isfile(caminho) else None
+
+def _formatos_validos(texto):
+    formatos = [f.strip().lower() for f in texto.split(",") if f.strip()]
+    invalidos = [f for f in formatos if f not in FORMATOS_SAIDA]
+    if invalidos or not formatos:
+        raise argparse.ArgumentTypeError(f"formato inválido: {', '.join(invalidos) or texto!r}")
+    if "parquet" in formatos:
+        import importlib.util
+        if importlib.util.find_spec("pyarrow") is None:
+            raise argparse.ArgumentTypeError("a saída parquet precisa do pacote pyarrow (pip install pyarrow)")
+    return tuple(formatos)
+
+def _numeros_validos(texto):
+    try:
+        return _faixas_de_inteiros(texto)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def _ler_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Gera a lista de REMOTE IO a partir de exportações .xef do Unity Pro.",
+                                     epilog="Consulta ao índice de tags: %(prog)s consultar INDICE_DB --help | "
+                                            "Validação contra uma planilha de campo: %(prog)s validar XEF XLSX --help | "
+                                            "Serviço HTTP: %(prog)s servir [RAIZ] --help")
+    parser.add_argument("entradas", nargs="*",
+                        help=f"Arquivos .xef, diretórios ou padrões glob (padrão: {ARQUIVO_UNITPRO} ao lado do programa)")
+    parser.add_argument("-o", "--output-dir", dest="pasta_saida", default=None,
+                        help="Diretório onde os .xlsx serão gravados (padrão: diretório atual)")
+    parser.add_argument("-j", "--jobs", dest="workers", type=int, default=None,
+                        help="Número de processos no modo lote ou do --excel-engine parallel (padrão: todos os núcleos)")
+    parser.add_argument("--no-cache", dest="usar_cache", action="store_false",
+                        help="Ignora o cache do modelo e relê o .xef do zero")
+    parser.add_argument("--cache-dir", dest="pasta_cache", default=None,
+                        help="Diretório do cache do modelo (padrão: cache do usuário)")
+    parser.add_argument("--excel-engine", dest="motor_excel", choices=["normal", "streaming", "parallel"],
+                        default=None,
+                        help="'streaming' gera o XML das linhas de cada drop e o grava direto no .xlsx, "
+                             "sem montar a planilha em memória; 'parallel' faz o mesmo com os drops "
+                             "em um pool de processos "
+                             "(padrão: normal; streaming no --watch)")
+    parser.add_argument("--per-drop", dest="por_drop", action="store_true",
+                        help="Grava um .xlsx por drop (REMOTE_IO_[TITULO]_DROP02_[DATA].xlsx), um por rack remoto")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Sobrepõe leitura e gravação: o esqueleto da planilha é montado em outro processo "
+                             "enquanto as variáveis são lidas e cada drop pronto vai por uma fila para a "
+                             "compressão (mesmo .xlsx do 'parallel'; ignorado com --per-drop)")
+    parser.add_argument("--drop", dest="drops", type=_numeros_validos, default=None, metavar="2,5",
+                        help="Gera só estes drops (lista e/ou faixas: 2,5 ou 2-4)")
+    parser.add_argument("--slot", dest="slots", type=_numeros_validos, default=None, metavar="4-10",
+                        help="Gera só estes slots (lista e/ou faixas)")
+    parser.add_argument("--card", dest="cartoes", default=None, metavar="140DDI*",
+                        help="Gera só os cartões cujo Part Number casa com um dos padrões (separados por vírgula)")
+    parser.add_argument("--real-channels", dest="canais_reais", action="store_true",
+                        help="Imprime só os bornes que cada cartão tem (8, 16...) em vez de sempre 32 "
+                             "(usa o motor 'parallel')")
+    parser.add_argument("--low-memory", dest="memoria_limitada", action="store_true",
+                        help="Leitura com memória limitada para .xef muito grandes: pula program/FBSource/"
+                             "DDTSource... no tokenizador e guarda só hardware e variáveis do dataBlock")
+    parser.add_argument("--catalog", dest="arquivo_catalogo", default=None, metavar="JSON",
+                        help=f"Catálogo de cartões (padrão: {ARQUIVO_CATALOGO} ao lado do programa, se existir; "
+                             "senão o empacotado com ele)")
+    parser.add_argument("--format", dest="formatos", default="xlsx", type=_formatos_validos,
+                        help=f"Formatos de saída separados por vírgula: {', '.join(FORMATOS_SAIDA)} (padrão: xlsx)")
+    parser.add_argument("--index", dest="arquivo_indice", default=None, metavar="INDICE_DB",
+                        help="Grava também um índice SQLite de tags/endereços/canais, consultável com "
+                             "'consultar INDICE_DB --tag X' sem reler o .xef")
+    parser.add_argument("--watch", dest="monitorar", action="store_true",
+                        help="Fica aberto e regenera a planilha sempre que um .xef do diretório é exportado de novo")
+    parser.add_argument("--profile", dest="perfilar", action="store_true",
+                        help="Mede tempo, contadores e pico de memória (tracemalloc) por etapa e emite um relatório JSON")
+    parser.add_argument("--profile-output", dest="arquivo_perfil", default=None, metavar="JSON",
+                        help="Arquivo do relatório do --profile (padrão: saída padrão)")
+    parser.add_argument("--cprofile", dest="arquivo_cprofile", default=None, metavar="PROF",
+                        help="Grava um dump do cProfile (pstats) da execução")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostra mensagens de depuração (ex.: cada módulo mapeado)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Mostra somente avisos e erros")
+    parser.add_argument("--incremental", dest="planilha_anterior", default=None, metavar="XLSX_ANTERIOR",
+                        help="Compara com a planilha REMOTE_IO anterior: só os blocos alterados recebem nova "
+                             "data de revisão e as células alteradas são listadas em um CSV")
+    return parser.parse_args(argv)
+
+#----------------------MAIN----------------------------
+if __name__ == "__main__":
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()  # Necessário para o ProcessPoolExecutor no executável (PyInstaller)
+    if len(sys.argv) > 1 and sys.argv[1] == "consultar":
+        sys.exit(_consultar_cli(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "validar":
+        sys.exit(_validar_cli(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "servir":
+        sys.exit(_servir_cli(sys.argv[2:]))
+
+    args = _ler_argumentos()
+    logging.basicConfig(format="%(message)s",
+                        level=logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO)
+
+    # --- DEFINIÇÃO UNIVERSAL DO CAMINHO BASE ---
+    diretorio_script = _diretorio_programa()
+
+    # --- Configuração de Caminhos ---
+    if args.entradas:
+        caminhos = listar_arquivos_xef(args.entradas)
+    else:
+        caminhos = [os.path.join(diretorio_script, ARQUIVO_UNITPRO)]
+
+    if args.pasta_saida:
+        os.makedirs(args.pasta_saida, exist_ok=True)
+
+    arquivo_catalogo = args.arquivo_catalogo or _catalogo_padrao(diretorio_script)
+    if arquivo_catalogo:
+        try:
+            usar_catalogo(arquivo_catalogo)
+        except (OSError, ValueError) as e:
+            log.error("Catálogo de cartões inválido: %s", e)
+            sys.exit(1)
+
+    # A planilha do --incremental é conferida antes de ler qualquer XEF: um arquivo
+    # errado só apareceria depois do parse inteiro, como traceback do zipfile
+    if args.planilha_anterior:
+        import zipfile
+        try:
+            with zipfile.ZipFile(args.planilha_anterior) as z:
+                z.getinfo("xl/workbook.xml")
+        except (OSError, zipfile.BadZipFile, KeyError):
+            log.error("Planilha anterior inválida (não é um .xlsx legível): %s", args.planilha_anterior)
+            sys.exit(1)
+
+    motor_excel = args.motor_excel or ("streaming" if args.monitorar else "normal")
+    filtro = None
+    if args.drops or args.slots or args.cartoes:
+        cartoes = [c.strip() for c in args.cartoes.split(",") if c.strip()] if args.cartoes else None
+        filtro = FiltroHardware(args.drops, args.slots, cartoes)
+    opcoes = dict(pasta_saida=args.pasta_saida, usar_cache=args.usar_cache, pasta_cache=args.pasta_cache,
+                  motor_excel=motor_excel, planilha_anterior=args.planilha_anterior,
+                  perfilar=args.perfilar, arquivo_cprofile=args.arquivo_cprofile, formatos=args.formatos,
+                  arquivo_indice=args.arquivo_indice, memoria_limitada=args.memoria_limitada,
+                  por_drop=args.por_drop, workers_excel=args.workers, arquivo_catalogo=arquivo_catalogo,
+                  pipeline=args.pipeline, canais_reais=args.canais_reais, filtro=filtro)
+
+    if args.monitorar:
+        monitorar(args.entradas or [diretorio_script], **opcoes)
+        sys.exit(0)
+
+    if len(caminhos) == 1 and not any(os.path.isdir(e) or glob.has_magic(e) for e in args.entradas):
+        if not os.path.isfile(caminhos[0]):
+            log.error("Arquivo não encontrado: %s", caminhos[0])
+            sys.exit(1)
+        try:
+            resultados = [processar_arquivo(caminhos[0], **opcoes)]
+        except ValueError as e:
+            log.error("Erro: %s", e)
+            sys.exit(1)
+        log.info("Processamento concluído.")
+    elif not caminhos:
+        log.error("Nenhum arquivo .xef encontrado.")
+        sys.exit(1)
+    else:
+        resultados = processar_lote(caminhos, args.workers, **opcoes)
+        imprimir_resumo(resultados)
+
+    if args.perfilar:
+        relatorio = [{'arquivo': r['arquivo'], 'tempo': round(r['tempo'], 6), 'erro': r['erro'], **(r['perfil'] or {})}
+                     for r in resultados]
+        texto = json.dumps(relatorio if len(relatorio) > 1 else relatorio[0], indent=2, ensure_ascii=False)
+        if args.arquivo_perfil:
+            with open(args.arquivo_perfil, "w", encoding="utf-8") as f:
+                f.write(texto)
+        else:
+            print(texto)
 
-    # 6. Geração do arquivo com o nome dinâmico: REMOTE_IO_[UC1000CC21]_2025-12-31.xlsx
-    gerar_excel(matriz_hardware, titulo_projeto, modelo_plc)
-    print("Processamento concluído.") 
\ No newline at end of file
+    sys.exit(1 if any(r['erro'] for r in resultados) else 0)
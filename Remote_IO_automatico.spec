@@ -5,7 +5,7 @@ a = Analysis(
     ['Remote_IO_automatico.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('catalogo_cartoes.json', '.')],  # catálogo de cartões (ver CatalogoCartoes.embutido)
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,65 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Perfil de build otimizado para a abertura do programa:
+#  - onedir (COLLECT): nada é descompactado para %TEMP% a cada execução, como
+#    acontece no onefile do Remote_IO_automatico.spec
+#  - sem UPX: as DLLs não precisam ser descomprimidas ao carregar
+#  - exclui pacotes que o openpyxl importa só se estiverem instalados (numpy,
+#    PIL, ...) e módulos da stdlib que o programa não usa
+# Gerar com: pyinstaller Remote_IO_automatico_startup.spec
+# Medir com: python benchmark_remote_io.py --startup "dist\Remote_IO_automatico\Remote_IO_automatico.exe --help"
+# Medido (PyInstaller 6.22, Linux x86_64, 1 CPU, --repeticoes 15, "--help"):
+#   Remote_IO_automatico.spec (onefile)  mín 0,43 s  mediana 0,52 s
+#   este perfil (onedir)                 mín 0,14 s  mediana 0,15 s
+# No Windows o onefile tende a perder mais (extração em %TEMP% + antivírus); lá
+# ainda não foi medido.
+
+
+a = Analysis(
+    ['Remote_IO_automatico.py'],
+    pathex=[],
+    binaries=[],
+    datas=[('catalogo_cartoes.json', '.')],  # catálogo de cartões (ver CatalogoCartoes.embutido)
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[
+        # Opcionais do openpyxl (imagens e arrays), ~200 módulos e a openblas do numpy
+        'numpy', 'PIL', 'pandas', 'lxml', 'defusedxml',
+        # Trazidos por outros pacotes do ambiente de build
+        'yaml', 'charset_normalizer', 'typing_extensions',
+        # stdlib sem uso no programa
+        'tkinter', '_tkinter', 'unittest', 'pydoc', 'pdb', 'doctest', 'lib2to3',
+        'xmlrpc', 'ftplib', 'imaplib', 'smtplib', 'poplib', 'mailbox', 'curses',
+    ],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='Remote_IO_automatico',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='Remote_IO_automatico',
+)
@@ -0,0 +1,283 @@
+"""
+Benchmark do Remote_IO_automatico.
+
+Gera um .xef sintético (N drops, M slots por drop, mistura de cartões state RAM e
+device DDT de MODELOS_BENCHMARK, K variáveis extras), mede o tempo de cada
+etapa do pipeline e o pico de memória (RSS) e grava o resultado em JSON para
+comparar versões.
+
+Uso:
+    python benchmark_remote_io.py --drops 20 --slots 10 --ddt 0.5 --variaveis 20000 -o resultado.json
+    python benchmark_remote_io.py ... --baseline resultado_versao_anterior.json
+
+Teto de memória da leitura limitada (--low-memory), com um .xef de ~500 MB:
+    python benchmark_remote_io.py --drops 20 --slots 10 --ffb 1500000 --low-memory --teto-memoria 64
+O pico de RSS da leitura depende do hardware e das variáveis do dataBlock, não
+do volume de lógica: o comando falha (código 1) se a etapa extrair_xef passar do teto.
+Referência (Linux, Python 3): 505 MB lidos com pico de 37 MB; a leitura padrão chega a 152 MB.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+import Remote_IO_automatico as rio
+
+try:
+    import resource  # Unix
+except ImportError:
+    resource = None
+
+
+#----------------------GERADOR DE XEF SINTÉTICO----------------------------
+
+# Cartões usados no .xef sintético (dados de canais/prefixo vêm do catálogo do
+# programa); lista fixa para os resultados continuarem comparáveis com --baseline
+MODELOS_BENCHMARK = (
+    "140ACI03000", "140ACO02000", "140ACO13000", "140ARI03010", "140DDI84100", "140DAI54000", "140DAI55300",
+    "140DAO84210", "140DAI74000", "140DDI35300", "140DDO35300", "BMXDDI3202K", "BMXDDO3202K",
+)
+
+def gerar_xef_sintetico(caminho, drops=10, slots=10, fracao_ddt=0.5, variaveis_extras=5000,
+                        blocos_ffb=0, semente=0):
+    """
+    Grava um .xef com a mesma estrutura que o programa lê do Unity Pro:
+    contentHeader, PLC/partItem, um moduleQuantum por slot (\\2.drop\\1.slot),
+    variáveis DDT com [n] -> VALUE -> Alias, variáveis com topologicalAddress para
+    os cartões state RAM e, opcionalmente, blocos FFB que o programa deve ignorar.
+    """
+    aleatorio = random.Random(semente)
+    modelos = sorted(MODELOS_BENCHMARK)
+    proximo_endereco = {}  # prefixo -> próximo offset livre
+    variaveis = []
+    ddts = []
+
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<ZEFExchangeFile>\n')
+        f.write('\t<fileHeader company="Schneider Automation" product="Benchmark" content="Project source file"></fileHeader>\n')
+        f.write('\t<contentHeader name="BENCH%02dx%02d" version="0.0.1"><comment>Benchmark</comment></contentHeader>\n'
+                % (drops, slots))
+        f.write('\t<IOConf>\n\t\t<PLC>\n\t\t\t<partItem family="Quantum" partNumber="140CPU65160"></partItem>\n')
+        f.write('\t\t\t<equipInfo topoAddress="\\1.1\\1.2" position="2"></equipInfo>\n')
+
+        for d in range(2, drops + 2):
+            f.write('\t\t\t<moduleQuantum><partItem family="Supply" partNumber="140CPS11420"></partItem>'
+                    '<equipInfo topoAddress="\\2.%d\\1.1"></equipInfo></moduleQuantum>\n' % d)
+            f.write('\t\t\t<moduleQuantum><partItem family="Communication" partNumber="140CRA93200"></partItem>'
+                    '<equipInfo topoAddress="\\2.%d\\1.2"></equipInfo></moduleQuantum>\n' % d)
+            for s in range(3, slots + 3):
+                modelo = modelos[(d * slots + s) % len(modelos)]
+                info = rio.CATALOGO.cartoes[modelo]
+                topo = "\\2.%d\\1.%d" % (d, s)
+
+                if aleatorio.random() < fracao_ddt:
+                    nome = "ED_DROP%02d_SLOT%02d" % (d, s)
+                    f.write('\t\t\t<moduleQuantum IOVision="device DDT"><deviceDDT implInstName="%s"></deviceDDT>'
+                            '<partItem partNumber="%s"></partItem><equipInfo topoAddress="%s"></equipInfo>'
+                            '<moduleInfo inputRefOffset="0" outputRefOffset="0"></moduleInfo></moduleQuantum>\n'
+                            % (nome, modelo, topo))
+                    canais = []
+                    for i in range(info.canais):
+                        tag = "TAG_D%02d_S%02d_C%02d" % (d, s, i)
+                        canais.append('<instanceElementDesc name="[%d]"><instanceElementDesc name="VALUE">'
+                                      '<attribute name="Alias" value="%s"></attribute>'
+                                      '</instanceElementDesc></instanceElementDesc>' % (i, tag))
+                        variaveis.append((tag, "EBOOL", None, "Comentario %s" % tag))
+                    ddts.append('\t\t<variables name="%s" typeName="T_Q_DIS_STD_IN_%d">'
+                                '<attribute name="Owner" value="%s"></attribute>'
+                                '<instanceElementDesc name="DIS_CH_IN">%s</instanceElementDesc></variables>\n'
+                                % (nome, info.canais, escape(topo), "".join(canais)))
+                else:
+                    prefixo = info.prefixo
+                    base = proximo_endereco.get(prefixo, 1)
+                    proximo_endereco[prefixo] = base + info.canais
+                    entrada, saida = (base, 0) if prefixo.startswith("%I") else (0, base)
+                    f.write('\t\t\t<moduleQuantum IOVision="state ram full"><partItem partNumber="%s"></partItem>'
+                            '<equipInfo topoAddress="%s"></equipInfo><moduleInfo inputRefOffset="%d" '
+                            'outputRefOffset="%d"></moduleInfo></moduleQuantum>\n' % (modelo, topo, entrada, saida))
+                    tipo = "WORD" if prefixo.endswith("W") else "EBOOL"
+                    for i in range(info.canais):
+                        tag = "SR_D%02d_S%02d_C%02d" % (d, s, i)
+                        variaveis.append((tag, tipo, "%s%05d" % (prefixo, base + i), "Comentario %s" % tag))
+
+        f.write('\t\t</PLC>\n\t</IOConf>\n')
+
+        # Lógica que o programa precisa atravessar sem guardar
+        f.write('\t<program><FBDSource>\n')
+        for b in range(blocos_ffb):
+            f.write('\t\t<FFBBlock instanceName="FBI_%d" typeName="AND_BOOL"><descriptionFFB execAfter="">'
+                    '<inputVariable invertedPin="false" formalParameter="IN1" effectiveParameter="X%d"></inputVariable>'
+                    '<outputVariable formalParameter="OUT" effectiveParameter="Y%d"></outputVariable>'
+                    '</descriptionFFB><objPosition posX="%d" posY="%d"></objPosition></FFBBlock>\n'
+                    % (b, b, b, b % 100, b // 100))
+        f.write('\t</FBDSource></program>\n')
+
+        f.write('\t<dataBlock>\n')
+        for nome, tipo, endereco, comentario in variaveis:
+            attr_end = ' topologicalAddress="%s"' % endereco if endereco else ""
+            f.write('\t\t<variables name="%s" typeName="%s"%s><comment>%s</comment></variables>\n'
+                    % (nome, tipo, attr_end, escape(comentario)))
+        for k in range(variaveis_extras):
+            f.write('\t\t<variables name="VAR_%06d" typeName="%s"><comment>Extra %d</comment></variables>\n'
+                    % (k, ("BOOL", "INT", "REAL", "DINT")[k % 4], k))
+        f.writelines(ddts)
+        f.write('\t\t<variables name=%s typeName="WORD"></variables>\n' % quoteattr("BENCH_DCOM"))
+        f.write('\t</dataBlock>\n</ZEFExchangeFile>\n')
+
+    return caminho
+
+
+#----------------------MEDIÇÃO----------------------------
+
+def _rss_pico_mb():
+    """Pico de RSS do processo até agora (None quando o SO não informa)."""
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB, macOS em bytes
+        return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except (ImportError, AttributeError):
+        return None
+
+def executar_benchmark(caminho_xef, pasta_saida, motor_excel="normal", memoria_limitada=False):
+    """Executa cada etapa do pipeline separadamente e devolve {etapa: {segundos, rss_pico_mb}}."""
+    etapas = {}
+    resultados = {}
+
+    def medir(nome, funcao, *args):
+        inicio = time.perf_counter()
+        retorno = funcao(*args)
+        duracao = time.perf_counter() - inicio
+        etapas[nome] = {"segundos": round(duracao, 4), "rss_pico_mb": _rss_pico_mb()}
+        return retorno
+
+    extrair = rio.extrair_xef_limitado if memoria_limitada else rio.extrair_xef
+    dados = medir("extrair_xef", extrair, caminho_xef)
+    mapa = medir("ler_variaveis_unitpro", rio.ler_variaveis_unitpro, dados)
+    matriz = medir("gerar_matriz_plc", rio.gerar_matriz_plc, dados)
+    medir("preencher_canais_da_matriz", rio.preencher_canais_da_matriz, dados, matriz, mapa)
+    medir("preencher_comentarios_na_matriz", rio.preencher_comentarios_na_matriz, matriz, mapa)
+    titulo, modelo_plc = medir("ler_titulo_modelo", rio.ler_titulo_modelo, dados, mapa)
+    medir("gerar_excel", rio.gerar_excel, matriz, titulo, modelo_plc, pasta_saida, motor_excel)
+
+    resultados["etapas"] = etapas
+    resultados["total_segundos"] = round(sum(e["segundos"] for e in etapas.values()), 4)
+    resultados["slots"] = sum(len(d.slots) for d in matriz.values())
+    resultados["variaveis_catalogadas"] = len(mapa)
+    return resultados
+
+def comparar_com_baseline(atual, baseline):
+    print(f"\n{'ETAPA':<34} {'ANTES(s)':>10} {'AGORA(s)':>10} {'VAR.':>8}")
+    for nome, dados in atual["etapas"].items():
+        antes = baseline.get("etapas", {}).get(nome, {}).get("segundos")
+        agora = dados["segundos"]
+        if antes is not None and antes > 0:
+            print(f"{nome:<34} {antes:>10.4f} {agora:>10.4f} {(agora - antes) / antes * 100:>+7.1f}%")
+        else:
+            antes_txt = "-" if antes is None else f"{antes:.4f}"
+            print(f"{nome:<34} {antes_txt:>10} {agora:>10.4f} {'-':>8}")
+
+
+def medir_abertura(comando, repeticoes=10):
+    """
+    Tempo de abertura a frio do programa (ex.: o .exe do PyInstaller com --help):
+    executa o comando 'repeticoes' vezes e devolve mínimo, mediana e máximo.
+    """
+    argumentos = shlex.split(comando, posix=os.name != "nt")
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run(argumentos, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        tempos.append(time.perf_counter() - inicio)
+    return {
+        "comando": comando,
+        "repeticoes": repeticoes,
+        "min_segundos": round(min(tempos), 4),
+        "mediana_segundos": round(statistics.median(tempos), 4),
+        "max_segundos": round(max(tempos), 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do gerador de REMOTE IO com XEF sintético.")
+    parser.add_argument("--drops", type=int, default=10)
+    parser.add_argument("--slots", type=int, default=10, help="Slots de I/O por drop (além de CPS e CRA)")
+    parser.add_argument("--ddt", type=float, default=0.5, help="Fração dos cartões em device DDT (0 a 1)")
+    parser.add_argument("--variaveis", type=int, default=5000, help="Variáveis extras sem ligação com I/O")
+    parser.add_argument("--ffb", type=int, default=0, help="Blocos FFB de lógica a incluir (só volume)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--excel-engine", dest="motor_excel", choices=["normal", "streaming"], default="normal")
+    parser.add_argument("--low-memory", dest="memoria_limitada", action="store_true",
+                        help="Lê o .xef com extrair_xef_limitado")
+    parser.add_argument("--teto-memoria", type=float, default=None, metavar="MB",
+                        help="Falha se o pico de RSS da leitura (extrair_xef) passar de MB")
+    parser.add_argument("--xef", default=None, help="Usa um .xef existente em vez de gerar um sintético")
+    parser.add_argument("-o", "--saida", default=None, help="Arquivo JSON com o resultado")
+    parser.add_argument("--baseline", default=None, help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--startup", default=None, metavar="COMANDO",
+                        help="Mede só a abertura a frio do comando (ex.: o .exe com --help) e sai")
+    parser.add_argument("--repeticoes", type=int, default=10, help="Execuções do --startup")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        resultado = {"versao": rio.VERSAO_FERRAMENTA, "plataforma": platform.platform(),
+                     "abertura": medir_abertura(args.startup, args.repeticoes)}
+        texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if args.saida:
+            with open(args.saida, "w", encoding="utf-8") as f:
+                f.write(texto)
+        print(texto)
+        return
+
+    with tempfile.TemporaryDirectory() as pasta:
+        if args.xef:
+            caminho = args.xef
+        else:
+            caminho = gerar_xef_sintetico(os.path.join(pasta, "bench.xef"), args.drops, args.slots, args.ddt,
+                                          args.variaveis, args.ffb, args.semente)
+        resultado = {
+            "versao": rio.VERSAO_FERRAMENTA,
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "parametros": {"drops": args.drops, "slots": args.slots, "ddt": args.ddt, "variaveis": args.variaveis,
+                           "ffb": args.ffb, "semente": args.semente, "motor_excel": args.motor_excel,
+                           "memoria_limitada": args.memoria_limitada, "xef": args.xef},
+            "arquivo_bytes": os.path.getsize(caminho),
+        }
+        resultado.update(executar_benchmark(caminho, pasta, args.motor_excel, args.memoria_limitada))
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    print(texto)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            comparar_com_baseline(resultado, json.load(f))
+
+    if args.teto_memoria is not None:
+        pico = resultado["etapas"]["extrair_xef"]["rss_pico_mb"]
+        if pico is None:
+            print("Teto de memória não verificado: o SO não informa o pico de RSS.")
+        elif pico > args.teto_memoria:
+            print(f"FALHOU: leitura de {resultado['arquivo_bytes'] / 2**20:.0f} MB usou {pico} MB "
+                  f"(teto {args.teto_memoria} MB).")
+            sys.exit(1)
+        else:
+            print(f"OK: leitura de {resultado['arquivo_bytes'] / 2**20:.0f} MB usou {pico} MB "
+                  f"(teto {args.teto_memoria} MB).")
+
+
+if __name__ == "__main__":
+    main()